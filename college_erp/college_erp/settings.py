@@ -86,6 +86,22 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'timetables' holds rendered weekly timetable grids (see erp/timetables.py). It is
+# file based so every worker process sees the same entries and invalidations.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'timetables': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'timetables',
+        'TIMEOUT': 7 * 24 * 60 * 60,
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.http import HttpResponse
+from django.shortcuts import redirect
 import csv
 from django.utils import timezone
 from .models import *
@@ -14,7 +15,7 @@ def export_fees_as_csv(modeladmin, request, queryset):
 	response['Content-Disposition'] = 'attachment; filename=fees_export.csv'
 	writer = csv.writer(response)
 	writer.writerow(field_names)
-	for obj in queryset:
+	for obj in queryset.with_balances().select_related('student__user'):
 		writer.writerow([
 			obj.student.roll_number,
 			obj.student.user.get_full_name(),
@@ -50,6 +51,9 @@ class FeesAdmin(admin.ModelAdmin):
 	search_fields = ('student__roll_number', 'student__user__first_name', 'student__user__last_name')
 	actions = [export_fees_as_csv, verify_selected_fees]
 
+	def get_queryset(self, request):
+		return super().get_queryset(request).with_balances().select_related('student__user')
+
 
 class FeePaymentAdmin(admin.ModelAdmin):
 	list_display = ('fee', 'amount', 'payment_method', 'transaction_id', 'paid_on')
@@ -57,10 +61,37 @@ class FeePaymentAdmin(admin.ModelAdmin):
 	search_fields = ('fee__student__roll_number', 'transaction_id')
 
 
+def _queue_no_dues_batch(request, queryset, fmt):
+	from .jobs import enqueue
+	job = enqueue('no_dues_batch', user=request.user, params={
+		'student_ids': list(queryset.values_list('id', flat=True)),
+		'format': fmt,
+	})
+	return redirect('job_status', job_id=job.id)
+
+
+@admin.action(description='Generate no-dues certificates (ZIP)')
+def generate_no_dues_zip(modeladmin, request, queryset):
+	return _queue_no_dues_batch(request, queryset, 'zip')
+
+
+@admin.action(description='Generate no-dues certificates (merged PDF)')
+def generate_no_dues_pdf(modeladmin, request, queryset):
+	return _queue_no_dues_batch(request, queryset, 'pdf')
+
+
+class StudentAdmin(admin.ModelAdmin):
+	list_display = ('roll_number', 'user', 'department', 'semester', 'section')
+	list_filter = ('department', 'semester')
+	search_fields = ('roll_number', 'user__first_name', 'user__last_name')
+	list_select_related = ('user', 'department')
+	actions = [generate_no_dues_zip, generate_no_dues_pdf]
+
+
 admin.site.register(Department)
 admin.site.register(Subject)
 admin.site.register(Teacher)
-admin.site.register(Student)
+admin.site.register(Student, StudentAdmin)
 admin.site.register(SubjectEnrollment)
 admin.site.register(Attendance)
 admin.site.register(Notice)
@@ -76,8 +107,8 @@ from .models import ImportLog
 
 
 class ImportLogAdmin(admin.ModelAdmin):
-	list_display = ('uploaded_at', 'uploaded_by', 'filename', 'created_count', 'updated_count', 'error_count')
-	readonly_fields = ('uploaded_at', 'uploaded_by', 'filename', 'created_count', 'updated_count', 'error_count', 'errors_preview')
+	list_display = ('uploaded_at', 'uploaded_by', 'filename', 'rows_processed', 'created_count', 'updated_count', 'error_count', 'completed_at')
+	readonly_fields = ('uploaded_at', 'uploaded_by', 'filename', 'rows_processed', 'created_count', 'updated_count', 'error_count', 'errors_preview', 'completed_at')
 
 
 admin.site.register(ImportLog, ImportLogAdmin)
@@ -105,3 +136,59 @@ class StudyMaterialAdmin(admin.ModelAdmin):
 
 
 admin.site.register(StudyMaterial, StudyMaterialAdmin)
+
+
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+	list_display = ('student', 'subject', 'present', 'total', 'percentage')
+	list_filter = ('subject',)
+	search_fields = ('student__roll_number', 'subject__code')
+	readonly_fields = ('student', 'subject', 'present', 'total')
+
+
+admin.site.register(AttendanceSummary, AttendanceSummaryAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'kind', 'status', 'progress', 'message', 'created_by', 'created_at', 'finished_at')
+	list_filter = ('kind', 'status')
+	readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+
+admin.site.register(Job, JobAdmin)
+
+
+class ResumeTextAdmin(admin.ModelAdmin):
+	list_display = ('content_hash', 'extracted_at')
+	search_fields = ('content_hash',)
+	readonly_fields = ('content_hash', 'text', 'analysis', 'extracted_at')
+
+
+admin.site.register(ResumeText, ResumeTextAdmin)
+
+
+class PlacementDriveAdmin(admin.ModelAdmin):
+	list_display = ('name', 'created_at', 'scored_at')
+	search_fields = ('name',)
+
+
+admin.site.register(PlacementDrive, PlacementDriveAdmin)
+
+
+class DriveScoreAdmin(admin.ModelAdmin):
+	list_display = ('drive', 'resume', 'score', 'scored_at')
+	list_filter = ('drive',)
+	search_fields = ('resume__student__roll_number',)
+	list_select_related = ('drive', 'resume__student')
+	readonly_fields = ('drive', 'resume', 'score', 'breakdown', 'scored_at')
+
+
+admin.site.register(DriveScore, DriveScoreAdmin)
+
+
+class MediaFileAdmin(admin.ModelAdmin):
+	list_display = ('path', 'name', 'size', 'mtime')
+	search_fields = ('name', 'path')
+	readonly_fields = ('path', 'name', 'directory', 'size', 'mtime')
+
+
+admin.site.register(MediaFile, MediaFileAdmin)
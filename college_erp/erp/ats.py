@@ -0,0 +1,242 @@
+"""
+ATS (applicant tracking system) scoring for resumes.
+
+All keyword tables are compiled once at import into a single lookup index:
+text is normalised with one ``str.translate`` pass and split into tokens
+once, and every category is then matched with set operations instead of a
+substring scan per keyword. Matching is on whole words (``project`` also
+matches ``projects``), the same rule the job-description match always used.
+
+``score_text`` returns the total score together with a per-category
+breakdown. It is split into ``analyze_text`` (the expensive, JD-independent
+scan) and ``score_analysis`` (cheap), so stored analyses can be rescored
+against new job descriptions. ``extract_text`` reads a PDF. This module has no Django
+dependencies so worker processes and ``scripts/benchmark_ats.py`` can
+import it directly.
+"""
+import io
+import re
+
+import PyPDF2
+
+# category -> (keywords, points per keyword, maximum points)
+CATEGORIES = {
+    'technical': ([
+        # programming
+        'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript',
+        # web
+        'html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring', 'asp.net',
+        # database
+        'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'redis', 'sqlite', 'dynamodb',
+        # devops
+        'docker', 'kubernetes', 'jenkins', 'git', 'github', 'gitlab', 'ci/cd', 'aws', 'azure', 'gcp',
+        # data
+        'machine learning', 'deep learning', 'data science', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn',
+    ], 2, 30),
+    'education': ([
+        'bachelor', 'master', 'phd', 'b.tech', 'm.tech', 'bca', 'mca', 'b.e', 'm.e',
+        'degree', 'diploma', 'university', 'college', 'cgpa', 'gpa', 'percentage',
+    ], 2, 15),
+    'experience': ([
+        'experience', 'worked', 'developed', 'implemented', 'designed', 'built',
+        'project', 'internship', 'achievement', 'accomplishment', 'responsible for',
+    ], 2, 20),
+    'soft_skills': ([
+        'leadership', 'communication', 'teamwork', 'problem solving', 'analytical',
+        'collaboration', 'adaptability', 'time management', 'critical thinking',
+    ], 2, 10),
+    'certifications': ([
+        'certified', 'certification', 'certificate', 'aws certified',
+        'google cloud', 'microsoft certified', 'coursera', 'udemy',
+    ], 3, 10),
+}
+
+# Headings that indicate a structured resume (part of the formatting score)
+SECTION_KEYWORDS = ['experience', 'education', 'skills', 'projects']
+
+TECHNICAL_SKILLS = frozenset(CATEGORIES['technical'][0])
+
+JD_MAX_POINTS = 20
+CONTACT_POINTS = 5
+FORMAT_MIN_LENGTH = 200
+
+MAX_SCORE = 100
+
+# Bump when keywords or analyze_text() change so stored analyses are recomputed
+ANALYZER_VERSION = 1
+
+# Everything except letters, digits, '+' and '#' separates tokens; letters are lowercased
+# in the same pass. 'node.js' -> 'node js', 'C++,' -> 'c++ '.
+_SEPARATORS = ''.join(chr(c) for c in range(128) if not (chr(c).isalnum() or chr(c) in '+#'))
+_NORMALIZE = str.maketrans(
+    {**{c: ' ' for c in _SEPARATORS}, **{chr(c): chr(c + 32) for c in range(ord('A'), ord('Z') + 1)}}
+)
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+# Ten digits, optionally grouped 3-3-4 by '-', '.' or whitespace; starts with a
+# character class so the regex engine can skip ahead to the first digit
+_HORIZONTAL_SPACE = re.compile(r'[ \t\r\f\v\x00]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+PHONE_RE = re.compile(r'[0-9](?<![\w][0-9])[0-9]{2}(?:[0-9]{7}|[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})\b')
+
+
+def _tokens(text):
+    return text.translate(_NORMALIZE).split()
+
+
+def _build_index():
+    """
+    Compile every keyword into the token form used for matching.
+
+    Returns ``(words, phrases)``: ``words`` maps a single token (and its plural)
+    to the keyword labels it stands for, ``phrases`` maps multi-token keywords to
+    their token tuples.
+    """
+    words = {}
+    phrases = {}
+    labels = {kw for keywords, _, _ in CATEGORIES.values() for kw in keywords} | set(SECTION_KEYWORDS)
+    for label in labels:
+        tokens = _tokens(label)
+        if len(tokens) == 1:
+            words.setdefault(tokens[0], set()).add(label)
+            words.setdefault(tokens[0] + 's', set()).add(label)
+        else:
+            phrases[label] = tokens
+    return {token: frozenset(found) for token, found in words.items()}, phrases
+
+
+_WORDS, _PHRASES = _build_index()
+
+
+def _scan(text):
+    """Tokenize ``text`` once; returns (keyword labels found, set of tokens)."""
+    tokens = _tokens(text)
+    token_set = set(tokens)
+    found = set()
+    for token in token_set.intersection(_WORDS):
+        found |= _WORDS[token]
+    # Phrases are only checked against the joined token stream when all of their words occur
+    joined = None
+    for label, phrase in _PHRASES.items():
+        if token_set.issuperset(phrase):
+            if joined is None:
+                joined = f" {' '.join(tokens)} "
+            if f" {' '.join(phrase)} " in joined:
+                found.add(label)
+    return found, token_set
+
+
+def find_keywords(text):
+    """Return the set of keyword labels (from any category) present in ``text``."""
+    return _scan(text)[0]
+
+
+def _has_email(text):
+    # Only look at the neighbourhood of each '@' instead of scanning the whole text
+    at = text.find('@')
+    while at != -1:
+        if EMAIL_RE.search(text, max(0, at - 64), at + 256):
+            return True
+        at = text.find('@', at + 1)
+    return False
+
+
+def _has_phone(text, token_set):
+    numbers = [token for token in token_set if token.isdigit() and len(token) >= 3]
+    if not numbers:
+        return False
+    if any(len(token) == 10 for token in numbers):
+        return True
+    return PHONE_RE.search(text) is not None
+
+
+def job_description_skills(job_description):
+    """Technical skills mentioned in a job description (compute once when scoring many resumes)."""
+    if not job_description:
+        return frozenset()
+    return frozenset(find_keywords(job_description) & TECHNICAL_SKILLS)
+
+
+def analyze_text(text):
+    """
+    The JD-independent part of scoring: keywords found, contact details and length.
+
+    The result is small and can be stored, so a resume can be rescored against
+    any number of job descriptions with ``score_analysis`` without touching the text.
+    """
+    found, token_set = _scan(text)
+    contact = []
+    if _has_email(text):
+        contact.append('email')
+    if _has_phone(text, token_set):
+        contact.append('phone')
+    return {'keywords': found, 'contact': contact, 'length': len(text)}
+
+
+def score_analysis(analysis, jd_skills=frozenset()):
+    """
+    Score an ``analyze_text`` result (0-100) against ``jd_skills`` from ``job_description_skills``.
+
+    Returns a dict::
+
+        {'score': 74, 'breakdown': {'technical': {'points': 12, 'max': 30, 'matched': [...]}, ...}}
+    """
+    found = analysis['keywords']
+    if not isinstance(found, (set, frozenset)):
+        found = set(found)
+    breakdown = {}
+
+    for category, (keywords, per_keyword, max_points) in CATEGORIES.items():
+        matched = sorted(found.intersection(keywords))
+        breakdown[category] = {
+            'points': min(len(matched) * per_keyword, max_points),
+            'max': max_points,
+            'matched': matched,
+        }
+
+    # Job description match (optional) - share of the JD's skills present in the resume
+    jd_points = 0
+    matched = []
+    if jd_skills:
+        matched = sorted(found.intersection(jd_skills))
+        jd_points = min(round(len(matched) / len(jd_skills) * JD_MAX_POINTS), JD_MAX_POINTS)
+    breakdown['job_description'] = {
+        'points': jd_points,
+        'max': JD_MAX_POINTS if jd_skills else 0,
+        'matched': matched,
+        'missing': sorted(set(jd_skills) - found),
+    }
+
+    contact = list(analysis['contact'])
+    breakdown['contact'] = {'points': CONTACT_POINTS * len(contact), 'max': 2 * CONTACT_POINTS, 'matched': contact}
+
+    sections = sorted(found.intersection(SECTION_KEYWORDS))
+    format_points = (2 if analysis['length'] > FORMAT_MIN_LENGTH else 0) + (3 if sections else 0)
+    breakdown['format'] = {'points': format_points, 'max': 5, 'matched': sections}
+
+    score = sum(part['points'] for part in breakdown.values())
+    return {'score': min(round(score), MAX_SCORE), 'breakdown': breakdown}
+
+
+def score_text(text, job_description=None, jd_skills=None):
+    """
+    Score resume ``text`` (0-100); see ``score_analysis`` for the result format.
+
+    Pass ``jd_skills`` from ``job_description_skills`` instead of ``job_description``
+    when scoring many resumes against the same description.
+    """
+    if jd_skills is None:
+        jd_skills = job_description_skills(job_description)
+    return score_analysis(analyze_text(text), jd_skills)
+
+
+def normalize_text(text):
+    """Collapse runs of spaces and blank lines and drop NUL bytes (which PostgreSQL text rejects)."""
+    return _BLANK_LINES.sub('\n', _HORIZONTAL_SPACE.sub(' ', text)).strip()
+
+
+def extract_text(fileobj):
+    """Extract the text of a PDF file object, page by page."""
+    reader = PyPDF2.PdfReader(io.BytesIO(fileobj.read()))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
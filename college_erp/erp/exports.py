@@ -0,0 +1,81 @@
+"""
+Streaming CSV exports.
+
+Rows come from ``QuerySet.iterator()`` and are written through ``csv.writer``
+into a StreamingHttpResponse, so an export never holds the whole file (or the
+whole result set) in memory. Views build a queryset with complete
+``select_related``, narrow it with ``filter_export`` and hand a row generator
+to ``stream_csv``.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.http import StreamingHttpResponse
+
+# Query-string parameter -> (lookup relative to the student, parser)
+STUDENT_FILTERS = {
+    'department': ('department__code', str),
+    'semester': ('semester', int),
+}
+
+# Query-string parameter -> (lookup relative to the resume, parser)
+RESUME_FILTERS = {
+    'min_ats': ('ats_score__gte', float),
+    'max_ats': ('ats_score__lte', float),
+    'min_tenth': ('tenth_percentage__gte', Decimal),
+    'min_twelfth': ('twelfth_percentage__gte', Decimal),
+}
+
+# Rows are joined into blocks of this many before being sent
+ROWS_PER_CHUNK = 200
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted CSV line back to the caller."""
+    def write(self, value):
+        return value
+
+
+def filter_export(queryset, params, student='student__', resume='student__resume__'):
+    """
+    Apply the department/semester and ATS/10th/12th filters found in ``params``
+    (usually ``request.GET``) to ``queryset``.
+
+    ``student`` and ``resume`` are the lookup prefixes from the queryset's model
+    to Student and Resume; pass ``resume=None`` when resumes are not reachable.
+    Blank or malformed values are ignored.
+    """
+    specs = [(student, STUDENT_FILTERS)]
+    if resume is not None:
+        specs.append((resume, RESUME_FILTERS))
+    for prefix, filters in specs:
+        for param, (lookup, parse) in filters.items():
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                value = parse(value)
+            except (TypeError, ValueError, InvalidOperation):
+                continue
+            queryset = queryset.filter(**{prefix + lookup: value})
+    return queryset
+
+
+def iter_csv(header, rows):
+    """Yield the CSV text for ``header`` and ``rows`` in blocks of ROWS_PER_CHUNK lines."""
+    writer = csv.writer(_Echo())
+    block = [writer.writerow(header)]
+    for row in rows:
+        block.append(writer.writerow(row))
+        if len(block) >= ROWS_PER_CHUNK:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def stream_csv(filename, header, rows):
+    """Return a StreamingHttpResponse that downloads ``rows`` as ``filename``."""
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
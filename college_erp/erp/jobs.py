@@ -0,0 +1,224 @@
+"""
+Database-backed background job queue.
+
+Views call ``enqueue()`` and return immediately; the ``run_jobs`` management
+command claims queued jobs and runs the handler registered for their kind.
+Claiming is a conditional UPDATE (queued -> running), so several workers can
+share the queue on PostgreSQL or SQLite without a message broker.
+
+A running job's worker refreshes ``heartbeat_at`` every HEARTBEAT_INTERVAL
+seconds. Jobs whose heartbeat is older than STALE_AFTER lost their worker
+(killed, out of memory, machine restarted); the next ``claim_next_job`` queues
+them again, or fails them once they have been started MAX_ATTEMPTS times.
+"""
+import datetime
+import os
+import tempfile
+import threading
+import traceback
+
+from django.core.files import File
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+JOB_HANDLERS = {}
+
+# Result files larger than this are spooled to disk while they are written
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = datetime.timedelta(minutes=5)
+MAX_ATTEMPTS = 2
+
+
+def register(kind):
+    """Decorator registering ``func(job, progress)`` as the handler for a job kind."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, user=None, params=None, input_file=None):
+    """Create a queued Job; ``input_file`` (e.g. an UploadedFile) is stored under MEDIA_ROOT."""
+    job = Job(kind=kind, created_by=user, params=params or {}, message='Waiting for a worker')
+    if input_file is not None:
+        job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    return job
+
+
+def set_progress(job, percent, message=''):
+    """Persist progress without touching other columns (the worker owns the row)."""
+    job.progress = max(0, min(int(percent), 100))
+    job.message = message[:255]
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, message=job.message, heartbeat_at=timezone.now())
+
+
+def reclaim_stale_jobs():
+    """
+    Queue running jobs whose worker stopped sending heartbeats again, or fail
+    them after MAX_ATTEMPTS starts. Returns ``(requeued, failed)`` counts.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=now - STALE_AFTER) | Q(heartbeat_at__isnull=True, started_at__lt=now - STALE_AFTER)
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status='queued', progress=0, message='Worker stopped responding; waiting for another worker'
+    )
+    failed_ids = list(stale.values_list('id', flat=True))
+    failed = Job.objects.filter(pk__in=failed_ids, status='running').update(
+        status='failed', message=f'Worker stopped responding ({MAX_ATTEMPTS} attempts)', finished_at=now
+    )
+    if failed:
+        from .models import Resume
+
+        # The placement cell shows "scoring..." until the resume leaves the pending state
+        resume_ids = [
+            params.get('resume_id')
+            for params in Job.objects.filter(pk__in=failed_ids, kind='ats_score').values_list('params', flat=True)
+        ]
+        Resume.objects.filter(pk__in=resume_ids, ats_status='pending').update(ats_status='failed')
+    return requeued, failed
+
+
+def claim_next_job(kinds=None):
+    """Atomically move the oldest queued job to running and return it, or None."""
+    reclaim_stale_jobs()
+    queued = Job.objects.filter(status='queued')
+    if kinds:
+        queued = queued.filter(kind__in=kinds)
+    for job_id in queued.order_by('created_at').values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1, message='Started'
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _send_heartbeats(job_id, stop):
+    """Refresh ``heartbeat_at`` until ``stop`` is set (runs in a thread beside the handler)."""
+    try:
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                Job.objects.filter(pk=job_id, status='running').update(heartbeat_at=timezone.now())
+            except DatabaseError:
+                # e.g. SQLite locked by the handler's transaction; the next beat retries
+                pass
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """Run a claimed job through its handler and record the outcome."""
+    handler = JOB_HANDLERS.get(job.kind)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_send_heartbeats, args=(job.pk, stop), daemon=True)
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise ValueError(f'No handler registered for job kind {job.kind!r}')
+        message = handler(job, lambda percent, msg='': set_progress(job, percent, msg))
+        job.status = 'done'
+        job.progress = 100
+        job.message = (message or 'Completed')[:255]
+    except Exception as e:
+        job.status = 'failed'
+        job.message = f'{type(e).__name__}: {e}'[:255]
+        traceback.print_exc()
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'result_file', 'finished_at'])
+    close_old_connections()
+    return job
+
+
+def save_result(job, filename, writer):
+    """
+    Run ``writer(fileobj)`` against a spooled temporary file and store it as the job's result.
+
+    Small artifacts stay in memory, large ones spill to disk, so memory is bounded either way.
+    The artifact ends up under MEDIA_ROOT/jobs/results/ and is streamed by the job download view.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        writer(tmp)
+        tmp.seek(0)
+        job.result_file.save(filename, File(tmp), save=False)
+
+
+# ============ Handlers ============
+
+@register('fee_import')
+def run_fee_import(job, progress):
+    from .utils import import_fees_csv
+
+    size = job.input_file.size or 1
+    with job.input_file.open('rb') as csv_file:
+        def on_chunk(log):
+            progress(min(99, csv_file.tell() * 100 // size), f'{log.rows_processed} rows processed')
+
+        log, errors = import_fees_csv(
+            csv_file,
+            job.created_by,
+            filename=job.params.get('filename', ''),
+            on_chunk=on_chunk
+        )
+    job.params = {**job.params, 'import_log_id': log.pk}
+    Job.objects.filter(pk=job.pk).update(params=job.params)
+    return (
+        f'Created {log.created_count}, updated {log.updated_count} fee records, '
+        f'{log.error_count} errors'
+    )
+
+
+@register('fees_report')
+def run_fees_report(job, progress):
+    from .reports import write_fees_report
+
+    save_result(job, 'fees_report.pdf', lambda out: write_fees_report(out, progress=progress))
+    return 'Fees report ready'
+
+
+@register('no_dues_batch')
+def run_no_dues_batch(job, progress):
+    from .models import Student
+    from .reports import write_no_dues_batch
+
+    students = Student.objects.filter(pk__in=job.params.get('student_ids', []))
+    fmt = job.params.get('format', 'zip')
+    workers = job.params.get('workers') or os.cpu_count() or 1
+    counts = {}
+
+    def writer(out):
+        counts['written'] = write_no_dues_batch(out, students, fmt=fmt, workers=workers, progress=progress)
+
+    save_result(job, f'no_dues_certificates.{fmt}', writer)
+    return f'{counts["written"]} certificates ready'
+
+
+@register('ats_score')
+def run_ats_score(job, progress):
+    from .models import Resume
+    from .utils import get_resume_text, score_resume_text
+
+    resume = Resume.objects.get(pk=job.params['resume_id'])
+    try:
+        with resume.resume_file.open('rb') as resume_file:
+            resume_text = get_resume_text(resume_file)
+        score = score_resume_text(resume_text, resume.job_description)
+    except Exception:
+        Resume.objects.filter(pk=resume.pk).update(ats_score=None, ats_status='failed')
+        raise
+    # Only touch the scoring columns; the student may have edited other fields meanwhile
+    Resume.objects.filter(pk=resume.pk).update(
+        ats_score=score, content_hash=resume_text.content_hash, ats_status='done'
+    )
+    return f'ATS score {score}'
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from erp.models import Teacher, Timetable
+from erp.schedule import DAYS, Schedule
+
+
+class Command(BaseCommand):
+    help = 'Validates every weekly timetable in one pass: subject/teacher clashes across sections and unstaffed subjects'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-slots',
+            action='store_true',
+            help='Print every timetable with its lecture times and slots',
+        )
+        parser.add_argument(
+            '--teacher',
+            type=str,
+            help='Print the weekly schedule of one teacher (employee id)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        schedule = Schedule.load()
+        clashes = schedule.clashes()
+        unstaffed = schedule.unstaffed()
+        elapsed = time.perf_counter() - started
+
+        if options['show_slots']:
+            self.show_slots(schedule)
+
+        if options.get('teacher'):
+            teacher = Teacher.objects.filter(employee_id=options['teacher']).first()
+            if teacher is None:
+                raise CommandError(f'No teacher with employee id {options["teacher"]}')
+            self.show_teacher(schedule, teacher)
+
+        for clash in clashes:
+            self.stdout.write(self.style.ERROR(f'  Clash - {schedule.describe(clash)}'))
+        for subject_id, timetable_ids in sorted(unstaffed.items()):
+            sections = ', '.join(schedule.timetable_labels.get(tt, f'timetable #{tt}') for tt in sorted(timetable_ids))
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  No teacher - {schedule.subject_labels.get(subject_id, subject_id)} is scheduled in {sections}'
+                )
+            )
+
+        lectures = sum(len(grid) for grid in schedule.sections.values())
+        summary = (
+            f'Checked {len(schedule.timetable_labels)} timetables ({lectures} lectures) in {elapsed:.2f}s: '
+            f'{len(clashes)} clashes, {len(unstaffed)} subjects without a teacher'
+        )
+        if clashes:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def show_slots(self, schedule):
+        for timetable in Timetable.objects.select_related('degree').order_by('degree__name', 'semester', 'section'):
+            times = ' '.join(
+                str(getattr(timetable, f'lecture{lecture}') or '-') for lecture in range(1, 8)
+            )
+            self.stdout.write(f'- ID={timetable.id} {timetable} active_days={timetable.active_days}')
+            self.stdout.write(f'  lecture times: {times} lunch={timetable.lunch or "-"}')
+            grid = schedule.section(timetable.id)
+            for day in DAYS:
+                cells = [schedule.subject_labels.get(grid.get((day, lecture)), '-') for lecture in range(1, 8)]
+                if any(cell != '-' for cell in cells):
+                    self.stdout.write(f'    {day}: {" | ".join(cells)}')
+
+    def show_teacher(self, schedule, teacher):
+        self.stdout.write(f'Schedule of {schedule.teacher_labels.get(teacher.id, teacher)}:')
+        week = schedule.teacher_week(teacher.id)
+        if not week:
+            self.stdout.write('  no lectures')
+        for day in DAYS:
+            for lecture in range(1, 8):
+                for timetable_id, subject_id in schedule.teaching(teacher.id, day, lecture):
+                    self.stdout.write(
+                        f'  {day} L{lecture}: {schedule.subject_labels.get(subject_id, subject_id)} - '
+                        f'{schedule.timetable_labels.get(timetable_id, timetable_id)}'
+                    )
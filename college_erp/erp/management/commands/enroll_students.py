@@ -1,6 +1,38 @@
+import time
+from concurrent.futures import as_completed
+
 from django.core.management.base import BaseCommand
-from erp.models import Student
-from erp.utils import auto_enroll_student_subjects
+from erp.models import Student, Subject, Teacher
+from erp.parallel import process_pool
+from erp.utils import bulk_enroll_students
+
+
+def describe_changes(changes):
+    """One line per planned enrollment, e.g. ``CS001: enroll in CS201 (teacher T001)``."""
+    rolls = dict(Student.objects.filter(id__in={c[0] for c in changes}).values_list('id', 'roll_number'))
+    codes = dict(Subject.objects.filter(id__in={c[1] for c in changes}).values_list('id', 'code'))
+    employees = dict(Teacher.objects.filter(id__in={c[2] for c in changes}).values_list('id', 'employee_id'))
+    lines = []
+    for student_id, subject_id, teacher_id, created in changes:
+        teacher = employees.get(teacher_id, 'none')
+        if created:
+            lines.append(f'{rolls[student_id]}: enroll in {codes[subject_id]} (teacher {teacher})')
+        else:
+            lines.append(f'{rolls[student_id]}: reassign {codes[subject_id]} to {teacher}')
+    return lines
+
+
+def enroll_chunk(student_ids, dry_run=False, verbose=False):
+    """
+    Worker entry point: enroll one chunk of students from the same department/semester.
+
+    With ``dry_run`` and ``verbose`` the planned enrollments are described too,
+    so the parent process can print them.
+    """
+    students = Student.objects.filter(id__in=student_ids).only('id', 'department_id', 'semester')
+    changes = [] if dry_run and verbose else None
+    created, updated = bulk_enroll_students(students, dry_run=dry_run, changes=changes)
+    return (len(student_ids), created, updated, describe_changes(changes) if changes else [])
 
 
 class Command(BaseCommand):
@@ -17,59 +49,132 @@ class Command(BaseCommand):
             type=str,
             help='Enroll only students in a specific department (use department code)',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of students per batch within a department/semester partition (default: 500)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes, each with its own DB connection (default: 1, no pool)',
+        )
+        parser.add_argument(
+            '--quiet',
+            action='store_true',
+            help='Only print the final summary',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the enrollments that would be created/updated, per student unless --quiet, without writing them',
+        )
 
     def handle(self, *args, **options):
         semester = options.get('semester')
         department_code = options.get('department')
-        
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        quiet = options['quiet']
+        dry_run = options['dry_run']
+
         # Build query
         students = Student.objects.all()
-        
+
         if semester:
             students = students.filter(semester=semester)
-            
+
         if department_code:
             students = students.filter(department__code=department_code)
-        
-        if not students.exists():
+
+        # Partition student ids by department/semester, then split partitions into chunks
+        partitions = {}
+        skipped = 0
+        for student_id, roll_number, dept_code, sem in students.order_by('id').values_list(
+            'id', 'roll_number', 'department__code', 'semester'
+        ):
+            if dept_code and sem:
+                partitions.setdefault((dept_code, sem), []).append(student_id)
+            else:
+                skipped += 1
+                if not quiet:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f'  Skipping {roll_number}: Missing department or semester'
+                        )
+                    )
+
+        if not partitions and not skipped:
             self.stdout.write(self.style.WARNING('No students found matching the criteria'))
             return
-        
+
+        tasks = [
+            ((dept_code, sem), ids[i:i + chunk_size])
+            for (dept_code, sem), ids in sorted(partitions.items())
+            for i in range(0, len(ids), chunk_size)
+        ]
+        total_students = sum(len(ids) for ids in partitions.values())
+
+        if not quiet:
+            mode = ' (dry run)' if dry_run else ''
+            self.stdout.write(
+                f'Processing {total_students} students in {len(partitions)} partitions, '
+                f'{len(tasks)} chunks, {workers} worker(s){mode}...'
+            )
+
         total_created = 0
         total_updated = 0
-        total_students = 0
-        
-        self.stdout.write(f'Processing {students.count()} students...')
-        
-        for student in students:
-            if student.department and student.semester:
-                created, updated = auto_enroll_student_subjects(student)
-                total_created += created
-                total_updated += updated
-                total_students += 1
-                
-                self.stdout.write(
-                    f'  {student.roll_number}: {created} new enrollments, {updated} updated'
-                )
-            else:
+        started = time.perf_counter()
+
+        def report(partition, result):
+            count, created, updated, changes = result
+            if not quiet:
+                created_verb, updated_verb = ('to create', 'to update') if dry_run else ('created', 'updated')
                 self.stdout.write(
-                    self.style.WARNING(
-                        f'  Skipping {student.roll_number}: Missing department or semester'
-                    )
+                    f'  {partition[0]} sem {partition[1]}: {count} students, '
+                    f'{created} enrollments {created_verb}, {updated} {updated_verb}'
                 )
-        
+                for line in changes:
+                    self.stdout.write(f'    {line}')
+            return created, updated
+
+        if workers == 1:
+            for partition, ids in tasks:
+                created, updated = report(partition, enroll_chunk(ids, dry_run, not quiet))
+                total_created += created
+                total_updated += updated
+        else:
+            with process_pool(workers) as pool:
+                futures = {pool.submit(enroll_chunk, ids, dry_run, not quiet): partition for partition, ids in tasks}
+                for future in as_completed(futures):
+                    created, updated = report(futures[future], future.result())
+                    total_created += created
+                    total_updated += updated
+
+        elapsed = time.perf_counter() - started
+        rate = total_students / elapsed if elapsed > 0 else total_students
+        prefix = '[dry-run] ' if dry_run else ''
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nCompleted! Processed {total_students} students'
+                f'\n{prefix}Completed! Processed {total_students} students in {elapsed:.2f}s ({rate:.0f} students/sec)'
             )
         )
         self.stdout.write(
             self.style.SUCCESS(
-                f'  - {total_created} new enrollments created'
+                f'  - {total_created} new enrollments {"to create" if dry_run else "created"}'
             )
         )
         self.stdout.write(
             self.style.SUCCESS(
-                f'  - {total_updated} enrollments updated'
+                f'  - {total_updated} enrollments {"to update" if dry_run else "updated"}'
             )
         )
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  - {skipped} students skipped (missing department or semester)'
+                )
+            )
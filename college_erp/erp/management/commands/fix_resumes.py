@@ -1,18 +1,120 @@
 import os
+import re
 import shutil
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
-from erp.models import Resume
+from erp import media_index
+from erp.models import MediaFile, Resume
+
+# Resumes are moved into this folder (relative to MEDIA_ROOT)
+TARGET_DIR = 'resumes'
+
+# Runs of letters/digits in a file name; up to this many adjacent runs are also
+# indexed joined together, so 'john_smith_cv.pdf' is found for 'johnsmith'
+_WORD_RE = re.compile(r'[a-z0-9]+')
+MAX_JOINED_WORDS = 3
+
+
+def compact(value):
+    """Lowercase ``value`` and drop everything but letters and digits ('John Smith' -> 'johnsmith')."""
+    return ''.join(_WORD_RE.findall((value or '').lower()))
+
+
+def filename_tokens(name):
+    """Every key a file called ``name`` can be matched by: its words and runs of adjacent words joined."""
+    words = _WORD_RE.findall(PurePosixPath(name.lower()).stem)
+    tokens = set()
+    for start in range(len(words)):
+        for end in range(start + 1, min(start + MAX_JOINED_WORDS, len(words)) + 1):
+            tokens.add(''.join(words[start:end]))
+    return tokens
+
+
+def build_token_index(files):
+    """Map token -> list of relative paths for ``files`` (an iterable of relative paths)."""
+    index = {}
+    for path in files:
+        for token in filename_tokens(PurePosixPath(path).name):
+            index.setdefault(token, []).append(path)
+    return index
+
+
+def plan_reconciliation(resumes, files):
+    """
+    Match every resume whose file is missing to the newest unclaimed file named after it.
+
+    ``resumes`` are Resume objects with student and user loaded, ``files`` maps
+    relative path -> mtime for everything under MEDIA_ROOT. A file matches when
+    the student's roll number, username or full name (without spaces) is one of
+    its name tokens. Files that another resume already points at, or that an
+    earlier entry of the plan took, are never chosen twice.
+
+    Returns ``(moves, not_found)``: moves is ``[(resume, source, target)]`` with
+    paths relative to MEDIA_ROOT.
+    """
+    index = build_token_index(files)
+    claimed = {resume.resume_file.name for resume in resumes if resume.resume_file}
+    claimed &= files.keys()
+    targets = set(path for path in files if path.startswith(TARGET_DIR + '/'))
+    moves = []
+    not_found = []
+
+    for resume in resumes:
+        current = resume.resume_file.name if resume.resume_file else None
+        if current and current in files:
+            continue
+
+        student = resume.student
+        keys = {compact(student.roll_number), compact(student.user.username), compact(student.user.get_full_name())}
+        candidates = {path for key in keys if key for path in index.get(key, ())}
+        candidates -= claimed
+        if not candidates:
+            not_found.append(resume)
+            continue
+
+        source = max(candidates, key=lambda path: (files[path], path))
+        claimed.add(source)
+        target = source
+        if PurePosixPath(source).parent != PurePosixPath(TARGET_DIR):
+            target = _free_target(PurePosixPath(source).name, targets)
+            targets.add(target)
+        moves.append((resume, source, target))
+
+    return moves, not_found
+
+
+def _free_target(name, taken):
+    """``resumes/<name>``, with a numeric suffix if that path exists or is already planned."""
+    path = PurePosixPath(TARGET_DIR) / name
+    counter = 1
+    while str(path) in taken:
+        path = PurePosixPath(TARGET_DIR) / f'{PurePosixPath(name).stem}_{counter}{PurePosixPath(name).suffix}'
+        counter += 1
+    return str(path)
 
 
 class Command(BaseCommand):
     help = 'Locate missing resume files in MEDIA_ROOT, move them to proper folders and update Resume records.'
 
     def add_arguments(self, parser):
-        parser.add_argument('--dry-run', action='store_true', help='Show actions without moving files')
+        parser.add_argument('--dry-run', action='store_true', help='Print the full plan without moving files')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of threads moving files (default: 8)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of Resume records per bulk update (default: 500)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options.get('dry_run')
@@ -21,89 +123,63 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'MEDIA_ROOT does not exist: {media_root}'))
             return
 
-        resumes = Resume.objects.select_related('student', 'student__user').all()
-        total_moved = 0
-        total_updated = 0
-        total_not_found = 0
-
-        # build a list of all files under media for faster lookup
-        all_files = []
-        for root, dirs, files in os.walk(media_root):
-            for f in files:
-                all_files.append(Path(root) / f)
-
-        def find_candidates(roll, username, fullname):
-            candidates = []
-            low_roll = (roll or '').lower()
-            low_user = (username or '').lower()
-            low_name = (fullname or '').replace(' ', '').lower() if fullname else ''
-            for p in all_files:
-                name = p.name.lower()
-                # match if filename contains roll or username or compact fullname
-                if low_roll and low_roll in name:
-                    candidates.append(p)
-                    continue
-                if low_user and low_user in name:
-                    candidates.append(p)
-                    continue
-                if low_name and low_name in name:
-                    candidates.append(p)
-                    continue
-                # also match filenames that include 'resume' and the username/roll
-                if 'resume' in name and (low_roll in name or low_user in name or low_name in name):
-                    candidates.append(p)
-            return list(dict.fromkeys(candidates))  # unique preserving order
-
-        for resume in resumes:
-            student = resume.student
-            roll = getattr(student, 'roll_number', '')
-            username = getattr(student.user, 'username', '') if getattr(student, 'user', None) else ''
-            fullname = student.user.get_full_name() if getattr(student, 'user', None) else ''
-
-            # Only handle single resume_file field and place into 'resumes/'
-            field = 'resume_file'
-            subdir = 'resumes'
-            filefield = getattr(resume, field)
-            current_name = getattr(filefield, 'name', None) if filefield else None
-
-            # If file exists at recorded path, nothing to do
-            if current_name:
-                abs_path = media_root / current_name
-                if abs_path.exists():
-                    continue
-
-            # Try to find candidates
-            candidates = find_candidates(roll, username, fullname)
-
-            if not candidates:
-                self.stdout.write(self.style.WARNING(f'No candidate found for student {roll} ({username}) field {field}'))
-                total_not_found += 1
-                continue
-
-            # Choose the most recently modified candidate
-            candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-            chosen = candidates[0]
-
-            rel_target_dir = Path(subdir)
-            target_dir = media_root / rel_target_dir
-            target_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        media_index.refresh(root=media_root)
+        files = dict(MediaFile.objects.values_list('path', 'mtime'))
+        resumes = list(Resume.objects.select_related('student', 'student__user'))
+        moves, not_found = plan_reconciliation(resumes, files)
+        self.stdout.write(
+            f'Matched {len(resumes)} resumes against {len(files)} files in {time.perf_counter() - started:.2f}s'
+        )
+
+        for resume, source, target in moves:
+            action = 'update record only' if source == target else f'move {source} -> {target}'
+            self.stdout.write(
+                self.style.NOTICE(f'{"[dry-run] " if dry_run else ""}Resume {resume.id} ({resume.student.roll_number}): {action}')
+            )
+        for resume in not_found:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'No candidate found for student {resume.student.roll_number} ({resume.student.user.username}) field resume_file'
+                )
+            )
+
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Plan: {sum(1 for _, source, target in moves if source != target)} files to move, '
+                    f'{len(moves)} records to update, not found: {len(not_found)}'
+                )
+            )
+            return
 
-            new_name = rel_target_dir / chosen.name
-            target_path = media_root / new_name
+        def move(source, target):
+            if source != target:
+                os.makedirs(media_root / PurePosixPath(target).parent, exist_ok=True)
+                shutil.move(str(media_root / source), str(media_root / target))
 
-            if dry_run:
-                self.stdout.write(self.style.NOTICE(f'[dry-run] Would move {chosen} -> {target_path} and update Resume {resume.id}.{field}'))
-            else:
+        moved = []
+        total_moved = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            futures = [pool.submit(move, source, target) for _, source, target in moves]
+            for future, (resume, source, target) in zip(futures, moves):
                 try:
-                    # move the file
-                    shutil.move(str(chosen), str(target_path))
-                    # update filefield name (relative to MEDIA_ROOT)
-                    setattr(resume, field, str(new_name).replace('\\', '/'))
-                    resume.save()
-                    total_moved += 1
-                    total_updated += 1
-                    self.stdout.write(self.style.SUCCESS(f'Moved {chosen} -> {target_path} and updated Resume {resume.id}.{field}'))
+                    future.result()
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'Error moving {chosen} for Resume {resume.id}: {e}'))
-
-        self.stdout.write(self.style.SUCCESS(f'Done. Files moved: {total_moved}, records updated: {total_updated}, not found: {total_not_found}'))
\ No newline at end of file
+                    self.stdout.write(self.style.ERROR(f'Error moving {source} for Resume {resume.id}: {e}'))
+                    continue
+                resume.resume_file.name = target
+                moved.append(resume)
+                total_moved += source != target
+
+        Resume.objects.bulk_update(moved, ['resume_file'], batch_size=max(1, options['batch_size']))
+        if moved:
+            media_index.refresh(root=media_root)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done in {elapsed:.2f}s. Files moved: {total_moved}, records updated: {len(moved)}, '
+                f'not found: {len(not_found)}'
+            )
+        )
@@ -0,0 +1,91 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from erp.models import Student
+from erp.reports import write_no_dues_batch
+
+
+class Command(BaseCommand):
+    help = 'Generates no-dues certificates for a whole cohort as one ZIP or merged PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            type=int,
+            help='Generate only for students in a specific semester',
+        )
+        parser.add_argument(
+            '--department',
+            type=str,
+            help='Generate only for students in a specific department (use department code)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['zip', 'pdf'],
+            default='zip',
+            help='zip: one PDF per student, pdf: a single merged PDF (default: zip)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Output file path (default: no_dues_<department>_<semester>.<format>)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of rendering processes (default: CPU count)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50,
+            help='Number of certificates rendered per worker task (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        semester = options.get('semester')
+        department_code = options.get('department')
+        fmt = options['format']
+
+        students = Student.objects.all()
+        if semester:
+            students = students.filter(semester=semester)
+        if department_code:
+            students = students.filter(department__code=department_code)
+
+        if not students.exists():
+            self.stdout.write(self.style.WARNING('No students found matching the criteria'))
+            return
+
+        output_path = options.get('output') or (
+            f'no_dues_{department_code or "all"}_{semester or "all"}.{fmt}'
+        )
+        workers = max(1, options['workers'])
+
+        def progress(percent, message):
+            self.stdout.write(f'  {message}')
+
+        started = time.perf_counter()
+        try:
+            with open(output_path, 'wb') as output:
+                count = write_no_dues_batch(
+                    output,
+                    students,
+                    fmt=fmt,
+                    workers=workers,
+                    chunk_size=max(1, options['chunk_size']),
+                    progress=progress
+                )
+        except OSError as e:
+            raise CommandError(f'Could not write {output_path}: {e}')
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else count
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted! {count} certificates written to {output_path} in {elapsed:.2f}s '
+                f'({rate:.0f} certificates/sec, {workers} worker(s))'
+            )
+        )
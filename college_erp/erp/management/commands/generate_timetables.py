@@ -0,0 +1,148 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from erp.models import Subject, SubjectEnrollment, Teacher, Timetable
+from erp.schedule import DAYS, Schedule
+from erp.timetable_solver import solve
+from erp.timetables import save_weekly_slots
+
+
+def load_sections(create_missing=False):
+    """
+    Solver input for every timetable: ``(timetables, sections, subject_teachers)``.
+
+    A section's subjects are the current-semester subjects its students are
+    enrolled in, with ``Subject.credits`` lectures a week. Timetables are
+    keyed by id. With ``create_missing`` every degree/section/semester that
+    has enrolled students but no timetable yet gets an unsaved Timetable,
+    keyed by a negative placeholder id; it is created on save.
+    """
+    enrolled = {}
+    rows = SubjectEnrollment.objects.filter(
+        student__degree__isnull=False, subject__semester=F('student__semester')
+    ).exclude(student__section__isnull=True).exclude(student__section='').values_list(
+        'student__degree_id', 'student__section', 'student__semester', 'subject_id'
+    ).distinct()
+    for degree_id, section, semester, subject_id in rows:
+        enrolled.setdefault((degree_id, section.strip().upper(), semester), set()).add(subject_id)
+
+    timetables = {
+        (t.degree_id, t.section.strip().upper(), t.semester): t
+        for t in Timetable.objects.select_related('degree')
+    }
+    ids = {key: t.pk for key, t in timetables.items()}
+    if create_missing:
+        for placeholder, (degree_id, section, semester) in enumerate(sorted(enrolled.keys() - timetables.keys()), 1):
+            timetables[(degree_id, section, semester)] = Timetable(
+                degree_id=degree_id, section=section, semester=semester
+            )
+            ids[(degree_id, section, semester)] = -placeholder
+
+    subjects = {
+        pk: (credits, is_lab)
+        for pk, credits, is_lab in Subject.objects.filter(
+            id__in={sid for ids in enrolled.values() for sid in ids}
+        ).values_list('id', 'credits', 'is_lab')
+    }
+    sections = {}
+    for key, timetable in timetables.items():
+        subject_ids = sorted(enrolled.get(key, ()))
+        if subject_ids:
+            sections[ids[key]] = {
+                'days': timetable.get_active_days_list() or DAYS,
+                'subjects': [(sid, subjects[sid][0], subjects[sid][1]) for sid in subject_ids],
+            }
+
+    subject_teachers = {}
+    for teacher_id, subject_id in Teacher.subjects.through.objects.values_list('teacher_id', 'subject_id'):
+        subject_teachers.setdefault(subject_id, set()).add(teacher_id)
+    return {ids[key]: t for key, t in timetables.items()}, sections, subject_teachers
+
+
+class Command(BaseCommand):
+    help = 'Generates clash-free weekly timetables for all sections from their subjects, labs and teachers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            default=30.0,
+            help='Seconds the solver may search before placing the rest greedily (default: 30)',
+        )
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help='Create timetables for sections that have enrolled students but no timetable',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the solver restarts (default: 0)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Solve and report without saving')
+
+    def handle(self, *args, **options):
+        timetables, sections, subject_teachers = load_sections(options['create_missing'])
+        if not sections:
+            raise CommandError('No timetable has a section with enrolled subjects')
+        skipped = len(timetables) - len(sections)
+        self.stdout.write(
+            f'Solving {len(sections)} timetables'
+            + (f' ({skipped} without enrolled subjects left unchanged)' if skipped else '')
+            + '...'
+        )
+
+        # Timetables that are not regenerated keep their slots, and their teachers stay busy
+        schedule = Schedule.load()
+        kept = [pk for pk in schedule.sections if pk not in sections]
+        solution = solve(
+            sections,
+            subject_teachers,
+            time_budget=options['time_budget'],
+            seed=options['seed'],
+            teacher_busy=schedule.teacher_occupancy(kept),
+        )
+
+        # Check the whole college as it would be after saving
+        schedule.replace_sections(solution['grid'])
+        schedule.timetable_labels.update((key, str(t)) for key, t in timetables.items() if t.pk is None)
+        clashes = schedule.clashes()
+        for clash in clashes:
+            self.stdout.write(self.style.ERROR(f'  Clash - {schedule.describe(clash)}'))
+        if clashes:
+            raise CommandError(f'The timetables would have {len(clashes)} clashes; nothing was saved')
+
+        for timetable_id, subject_id, lectures in solution['unplaced']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  {schedule.subject_labels.get(subject_id, subject_id)}: {lectures} lecture(s) did not fit '
+                    f'in {schedule.timetable_labels.get(timetable_id, timetable_id)}'
+                )
+            )
+        if options['verbosity'] >= 2:
+            for (timetable_id, subject_id), teacher_id in sorted(solution['teachers'].items()):
+                self.stdout.write(
+                    f'  {schedule.timetable_labels[timetable_id]}: '
+                    f'{schedule.subject_labels.get(subject_id, subject_id)} -> '
+                    f'{schedule.teacher_labels.get(teacher_id, "no teacher")}'
+                )
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                for key, grid in solution['grid'].items():
+                    timetable = timetables[key]
+                    if timetable.pk is None:
+                        timetable.save()
+                    save_weekly_slots(timetable, sections[key]['days'], grid)
+
+        lectures = sum(len(grid) for grid in solution['grid'].values())
+        summary = (
+            f'{"Generated" if not options["dry_run"] else "[dry-run] Would save"} {len(sections)} timetables, '
+            f'{lectures} lectures in {solution["elapsed"]:.2f}s '
+            f'({solution["backtracks"]} backtracks, {solution["restarts"]} restarts)'
+        )
+        if solution['unplaced']:
+            self.stdout.write(self.style.WARNING(f'{summary}; {len(solution["unplaced"])} subjects incomplete'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
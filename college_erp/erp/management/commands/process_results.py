@@ -0,0 +1,99 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from erp.models import Student, SemesterPerformance
+
+
+class Command(BaseCommand):
+    help = 'Computes SGPA/CGPA for a whole cohort and stores them as SemesterPerformance snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            type=int,
+            help='Process only students in a specific semester',
+        )
+        parser.add_argument(
+            '--department',
+            type=str,
+            help='Process only students in a specific department (use department code)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of students aggregated and written per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        semester = options.get('semester')
+        department_code = options.get('department')
+        chunk_size = max(1, options['chunk_size'])
+
+        students = Student.objects.all()
+        if semester:
+            students = students.filter(semester=semester)
+        if department_code:
+            students = students.filter(department__code=department_code)
+
+        total_students = 0
+        total_rows = 0
+        started = time.perf_counter()
+        last_id = 0
+
+        # Keyset pagination over student ids keeps memory bounded to one chunk
+        while True:
+            chunk = list(
+                students.filter(id__gt=last_id).order_by('id').values_list('id', 'semester')[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            total_students += len(chunk)
+
+            gpa = Student.calculate_cohort_gpa(Student.objects.filter(id__in=[sid for sid, _ in chunk]))
+            snapshots = [
+                SemesterPerformance(
+                    student_id=sid,
+                    semester=sem,
+                    sgpa=Decimal(str(gpa[sid][0])),
+                    cgpa=Decimal(str(gpa[sid][1]))
+                )
+                for sid, sem in chunk
+                # No current-semester grades yet: keep any SGPA already recorded for the semester
+                if sid in gpa and gpa[sid][0] is not None
+            ]
+            with transaction.atomic():
+                SemesterPerformance.objects.bulk_create(
+                    snapshots,
+                    update_conflicts=True,
+                    unique_fields=['student', 'semester'],
+                    update_fields=['sgpa', 'cgpa']
+                )
+            total_rows += len(snapshots)
+
+            self.stdout.write(f'  Processed {total_students} students, {total_rows} snapshots written')
+
+        elapsed = time.perf_counter() - started
+        if not total_students:
+            self.stdout.write(self.style.WARNING('No students found matching the criteria'))
+            return
+
+        rate = total_rows / elapsed if elapsed > 0 else total_rows
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted! Processed {total_students} students in {elapsed:.2f}s'
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  - {total_rows} semester results written ({rate:.0f} rows/sec)'
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  - {total_students - total_rows} students skipped (no graded subjects this semester)'
+            )
+        )
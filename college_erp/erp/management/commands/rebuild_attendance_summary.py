@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from erp.utils import refresh_attendance_summary
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the AttendanceSummary table from Attendance with a single GROUP BY'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = refresh_attendance_summary()
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt {rows} attendance summary rows in {elapsed:.2f}s'
+            )
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from erp import media_index
+from erp.models import MediaFile
+
+
+class Command(BaseCommand):
+    help = 'Updates the basename -> path index of MEDIA_ROOT used to locate moved uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='List every directory, not only those whose mtime changed since the last refresh',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats = media_index.refresh(full=options['full'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Media index refreshed in {elapsed:.2f}s: {stats["scanned"]} directories listed, '
+                f'{stats["skipped"]} unchanged; {stats["added"]} files added, {stats["updated"]} updated, '
+                f'{stats["removed"]} removed ({MediaFile.objects.count()} indexed)'
+            )
+        )
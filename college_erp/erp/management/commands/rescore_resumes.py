@@ -0,0 +1,183 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from erp.ats import job_description_skills, score_analysis
+from erp.exports import filter_export
+from erp.models import DriveScore, PlacementDrive, Resume, ResumeText
+from erp.parallel import process_pool
+
+
+def score_chunk(rows, jd_skills):
+    """
+    Worker entry point: score ``[(resume_id, content_hash, file_name), ...]`` against ``jd_skills``.
+
+    Cached analyses are loaded with one query; only resumes whose file has never
+    been seen are opened and parsed. Returns ``(scores, new_hashes, failed)`` where
+    scores is ``[(resume_id, score, breakdown)]`` and new_hashes ``[(resume_id, content_hash)]``.
+    """
+    from django.core.files.storage import default_storage
+    from erp.utils import get_resume_text
+
+    cached = {
+        rt.content_hash: rt
+        for rt in ResumeText.objects.filter(content_hash__in=[h for _, h, _ in rows if h])
+    }
+    scores = []
+    new_hashes = []
+    failed = 0
+    for resume_id, content_hash, file_name in rows:
+        resume_text = cached.get(content_hash)
+        try:
+            if resume_text is None:
+                with default_storage.open(file_name, 'rb') as resume_file:
+                    resume_text = get_resume_text(resume_file)
+                new_hashes.append((resume_id, resume_text.content_hash))
+            result = score_analysis(resume_text.get_analysis(), jd_skills)
+        except Exception:
+            failed += 1
+            continue
+        scores.append((resume_id, result['score'], result['breakdown']))
+    return scores, new_hashes, failed
+
+
+class Command(BaseCommand):
+    help = 'Scores every resume (or a filtered subset) against a placement drive job description'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'jd_file',
+            help='Path to a text file with the job description',
+        )
+        parser.add_argument(
+            '--drive',
+            type=str,
+            help='Placement drive name (default: the JD file name without extension)',
+        )
+        parser.add_argument(
+            '--department',
+            type=str,
+            help='Score only students in a specific department (use department code)',
+        )
+        parser.add_argument(
+            '--semester',
+            type=int,
+            help='Score only students in a specific semester',
+        )
+        parser.add_argument(
+            '--min-tenth',
+            type=float,
+            help='Score only students with at least this 10th percentage',
+        )
+        parser.add_argument(
+            '--min-twelfth',
+            type=float,
+            help='Score only students with at least this 12th percentage',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of scoring processes (default: CPU count)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Number of resumes per worker task and per bulk write (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        jd_file = options['jd_file']
+        try:
+            with open(jd_file, encoding='utf-8') as f:
+                job_description = f.read().strip()
+        except OSError as e:
+            raise CommandError(f'Could not read {jd_file}: {e}')
+        if not job_description:
+            raise CommandError(f'{jd_file} is empty')
+
+        drive_name = options.get('drive') or os.path.splitext(os.path.basename(jd_file))[0]
+        drive, created = PlacementDrive.objects.update_or_create(
+            name=drive_name, defaults={'job_description': job_description}
+        )
+        jd_skills = job_description_skills(job_description)
+        self.stdout.write(
+            f'{"Created" if created else "Updating"} drive "{drive.name}" '
+            f'({len(jd_skills)} skills in the job description: {", ".join(sorted(jd_skills)) or "none"})'
+        )
+
+        resumes = filter_export(
+            Resume.objects.exclude(resume_file='').exclude(resume_file__isnull=True),
+            {
+                'department': options.get('department'),
+                'semester': options.get('semester'),
+                'min_tenth': options.get('min_tenth'),
+                'min_twelfth': options.get('min_twelfth'),
+            },
+            resume=''
+        )
+        rows = list(resumes.order_by('id').values_list('id', 'content_hash', 'resume_file'))
+        if not rows:
+            self.stdout.write(self.style.WARNING('No resumes found matching the criteria'))
+            return
+
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        self.stdout.write(f'Scoring {len(rows)} resumes in {len(chunks)} chunks with {workers} worker(s)...')
+
+        started = time.perf_counter()
+        totals = {'scored': 0, 'extracted': 0, 'failed': 0}
+
+        def save(result):
+            scores, new_hashes, failed = result
+            with transaction.atomic():
+                DriveScore.objects.bulk_create(
+                    [
+                        DriveScore(drive=drive, resume_id=resume_id, score=score, breakdown=breakdown)
+                        for resume_id, score, breakdown in scores
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['drive', 'resume'],
+                    update_fields=['score', 'breakdown', 'scored_at']
+                )
+                if new_hashes:
+                    Resume.objects.bulk_update(
+                        [Resume(id=resume_id, content_hash=content_hash) for resume_id, content_hash in new_hashes],
+                        ['content_hash']
+                    )
+            totals['scored'] += len(scores)
+            totals['extracted'] += len(new_hashes)
+            totals['failed'] += failed
+            self.stdout.write(f'  Scored {totals["scored"]} of {len(rows)} resumes')
+
+        if workers == 1 or len(chunks) == 1:
+            for chunk in chunks:
+                save(score_chunk(chunk, jd_skills))
+        else:
+            with process_pool(workers) as pool:
+                for result in pool.map(score_chunk, chunks, [jd_skills] * len(chunks)):
+                    save(result)
+
+        PlacementDrive.objects.filter(pk=drive.pk).update(scored_at=timezone.now())
+        elapsed = time.perf_counter() - started
+        rate = totals['scored'] / elapsed if elapsed > 0 else totals['scored']
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted! Scored {totals["scored"]} resumes for "{drive.name}" in {elapsed:.2f}s '
+                f'({rate:.0f} resumes/sec)'
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'  - {totals["scored"] - totals["extracted"]} from cached text, {totals["extracted"]} PDFs parsed'
+            )
+        )
+        if totals['failed']:
+            self.stdout.write(
+                self.style.WARNING(f'  - {totals["failed"]} resumes could not be read')
+            )
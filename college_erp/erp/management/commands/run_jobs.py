@@ -0,0 +1,93 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from erp.jobs import claim_next_job, run_job
+from erp.parallel import process_pool
+
+
+def process_jobs(kinds=None, once=False, interval=2.0, log=print, success=str, error=str):
+    """
+    Claim and run queued jobs until the queue is empty (``once``) or forever.
+
+    Used directly by a single worker and as the entry point of each process in a
+    worker pool; claiming is atomic, so any number of these can share the queue.
+    Returns the number of jobs processed.
+    """
+    processed = 0
+    prefix = f'[{os.getpid()}] '
+    try:
+        while True:
+            job = claim_next_job(kinds)
+            if job is None:
+                if once:
+                    break
+                time.sleep(interval)
+                continue
+
+            started = time.perf_counter()
+            log(f'  {prefix}Running {job}...')
+            job = run_job(job)
+            processed += 1
+            style = success if job.status == 'done' else error
+            log(style(f'  {prefix}{job}: {job.message} ({time.perf_counter() - started:.2f}s)'))
+    except KeyboardInterrupt:
+        pass
+    return processed
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (fee imports, reports, archives, ATS scoring) from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs currently queued, then exit instead of polling',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between polls when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind (can be repeated)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes sharing the queue (default: 1, no pool)',
+        )
+
+    def handle(self, *args, **options):
+        once = options['once']
+        interval = options['interval']
+        kinds = options.get('kinds')
+        workers = max(1, options['workers'])
+
+        self.stdout.write(
+            f'Job worker started with {workers} process(es){" (single pass)" if once else ""}...'
+        )
+        started = time.perf_counter()
+        processed = 0
+        try:
+            if workers == 1:
+                processed = process_jobs(
+                    kinds, once, interval,
+                    log=self.stdout.write, success=self.style.SUCCESS, error=self.style.ERROR
+                )
+            else:
+                with process_pool(workers) as pool:
+                    futures = [pool.submit(process_jobs, kinds, once, interval) for _ in range(workers)]
+                    processed = sum(future.result() for future in futures)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nInterrupted'))
+
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed > 0 else processed
+        self.stdout.write(self.style.SUCCESS(f'Done. Jobs processed: {processed} ({rate:.1f} jobs/sec)'))
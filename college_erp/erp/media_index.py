@@ -0,0 +1,158 @@
+"""
+Persistent basename -> path index of the files under MEDIA_ROOT.
+
+Uploads that were moved or restored by hand are no longer at the path their
+FileField records. Instead of walking MEDIA_ROOT to find them, the tree is
+indexed once into MediaDirectory/MediaFile rows and kept current with
+``refresh``: a directory is only listed again when its mtime changed (adding,
+removing or renaming an entry updates it), unchanged directories are
+descended through their stored subdirectory list, so a refresh of an
+unchanged tree costs one ``stat`` per directory.
+
+Rewriting a file in place does not touch its directory's mtime, so ``size``
+and ``mtime`` of a MediaFile can lag behind; the basename -> path mapping,
+which is what lookups need, cannot.
+
+Lookups only build the index when it has never been built (a fresh deploy
+or database); after that it is refreshed by ``refresh_media_index`` (run it
+from cron) and ``fix_resumes``, so a file moved since the last refresh is a
+miss until the next one.
+
+    from erp import media_index
+    media_index.locate('resume_21CS042.pdf')   # 'old_uploads/resume_21CS042.pdf' or None
+"""
+import os
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import MediaDirectory, MediaFile
+
+
+def _join(directory, name):
+    return f'{directory}/{name}' if directory else name
+
+
+def _list_directory(root, directory):
+    """Return ``(files, subdirs)`` of one directory; files maps relative path -> (name, size, mtime)."""
+    files = {}
+    subdirs = []
+    with os.scandir(os.path.join(root, directory)) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(_join(directory, entry.name))
+            elif entry.is_file():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[_join(directory, entry.name)] = (entry.name, stat.st_size, stat.st_mtime)
+    return files, sorted(subdirs)
+
+
+def _sync_files(directory, files):
+    """Make the MediaFile rows of ``directory`` match ``files``; returns (added, updated, removed)."""
+    existing = {f.path: f for f in MediaFile.objects.filter(directory=directory)}
+    added = [
+        MediaFile(path=path, name=name, directory=directory, size=size, mtime=mtime)
+        for path, (name, size, mtime) in files.items() if path not in existing
+    ]
+    updated = []
+    for path, (name, size, mtime) in files.items():
+        media_file = existing.get(path)
+        if media_file is not None and (media_file.size, media_file.mtime) != (size, mtime):
+            media_file.size, media_file.mtime = size, mtime
+            updated.append(media_file)
+    removed = [media_file.pk for path, media_file in existing.items() if path not in files]
+
+    # A concurrent refresh may have indexed the same files already
+    MediaFile.objects.bulk_create(added, batch_size=500, ignore_conflicts=True)
+    MediaFile.objects.bulk_update(updated, ['size', 'mtime'], batch_size=500)
+    MediaFile.objects.filter(pk__in=removed).delete()
+    return len(added), len(updated), len(removed)
+
+
+def refresh(full=False, root=None):
+    """
+    Bring the index up to date with the filesystem.
+
+    Only directories whose mtime changed since the last refresh are listed;
+    ``full=True`` lists every directory (and picks up in-place size/mtime changes).
+    Returns counts: ``{'scanned', 'skipped', 'added', 'updated', 'removed'}``.
+    """
+    root = str(root or settings.MEDIA_ROOT)
+    stats = {'scanned': 0, 'skipped': 0, 'added': 0, 'updated': 0, 'removed': 0}
+    known = {d.path: d for d in MediaDirectory.objects.all()}
+    seen = set()
+    pending = ['']
+
+    with transaction.atomic():
+        while pending:
+            directory = pending.pop()
+            try:
+                # Stat before listing: an entry added while listing leaves a newer mtime for next time
+                mtime_ns = os.stat(os.path.join(root, directory)).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            seen.add(directory)
+            indexed = known.get(directory)
+
+            if indexed is not None and indexed.mtime_ns == mtime_ns and not full:
+                stats['skipped'] += 1
+                pending.extend(indexed.subdirs)
+                continue
+
+            files, subdirs = _list_directory(root, directory)
+            added, updated, removed = _sync_files(directory, files)
+            stats['scanned'] += 1
+            stats['added'] += added
+            stats['updated'] += updated
+            stats['removed'] += removed
+
+            MediaDirectory.objects.update_or_create(
+                path=directory, defaults={'mtime_ns': mtime_ns, 'subdirs': subdirs}
+            )
+            pending.extend(subdirs)
+
+        gone = [path for path in known if path not in seen]
+        if gone:
+            stats['removed'] += MediaFile.objects.filter(directory__in=gone).delete()[0]
+            MediaDirectory.objects.filter(path__in=gone).delete()
+
+    return stats
+
+
+def ensure_indexed(root=None):
+    """Build the index with a full ``refresh`` if it has never been built; returns whether it did."""
+    if MediaDirectory.objects.exists():
+        return False
+    refresh(full=True, root=root)
+    return True
+
+
+def find(name, root=None):
+    """Relative paths of every indexed file called ``name``, most recently modified first."""
+    ensure_indexed(root)
+    return list(
+        MediaFile.objects.filter(name=name).order_by('-mtime', 'path').values_list('path', flat=True)
+    )
+
+
+def locate(name, root=None):
+    """
+    Relative path of the newest file called ``name`` under MEDIA_ROOT, or None.
+
+    Index hits are checked against the filesystem; a miss or a stale hit
+    returns None rather than refreshing the index (safe to call from a view).
+    Only the first lookup against an empty index walks MEDIA_ROOT to build it.
+    """
+    root = str(root or settings.MEDIA_ROOT)
+    for path in find(name, root=root):
+        if os.path.isfile(os.path.join(root, path)):
+            return path
+    return None
+
+
+def url_for(path):
+    """MEDIA_URL for a path relative to MEDIA_ROOT."""
+    return settings.MEDIA_URL.rstrip('/') + '/' + path
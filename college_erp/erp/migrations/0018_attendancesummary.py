@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_attendance_summary(apps, schema_editor):
+    Attendance = apps.get_model('erp', 'Attendance')
+    AttendanceSummary = apps.get_model('erp', 'AttendanceSummary')
+    rows = Attendance.objects.values('student_id', 'subject_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(is_present=True))
+    ).order_by()
+    AttendanceSummary.objects.bulk_create(
+        [AttendanceSummary(**row) for row in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0017_auto_20251202_1528'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='erp.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='erp.subject')),
+            ],
+            options={
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+        migrations.RunPython(populate_attendance_summary, migrations.RunPython.noop),
+    ]
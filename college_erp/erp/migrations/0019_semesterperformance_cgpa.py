@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0018_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semesterperformance',
+            name='cgpa',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+    ]
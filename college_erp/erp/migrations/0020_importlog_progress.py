@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0019_semesterperformance_cgpa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='rows_processed',
+            field=models.IntegerField(default=0),
+        ),
+    ]
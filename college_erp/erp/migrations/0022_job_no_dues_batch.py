@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0021_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('fee_import', 'Fee Import'), ('fees_report', 'Fees Report'), ('resumes_zip', 'Resumes ZIP'), ('no_dues_batch', 'No Dues Certificates')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0023_resumetext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='ats_status',
+            field=models.CharField(blank=True, choices=[('', 'Not scored'), ('pending', 'Scoring'), ('done', 'Scored'), ('failed', 'Failed')], default='', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('fee_import', 'Fee Import'), ('fees_report', 'Fees Report'), ('resumes_zip', 'Resumes ZIP'), ('no_dues_batch', 'No Dues Certificates'), ('ats_score', 'ATS Scoring')], max_length=30),
+        ),
+    ]
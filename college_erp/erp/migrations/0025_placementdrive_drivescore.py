@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0024_resume_ats_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlacementDrive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('job_description', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('scored_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DriveScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('breakdown', models.JSONField(blank=True, default=dict)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drive_scores', to='erp.resume')),
+                ('drive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='erp.placementdrive')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'unique_together': {('drive', 'resume')},
+            },
+        ),
+    ]
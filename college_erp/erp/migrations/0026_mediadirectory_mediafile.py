@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0025_placementdrive_drivescore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text="Relative to MEDIA_ROOT, '' for the root", max_length=500, unique=True)),
+                ('mtime_ns', models.BigIntegerField()),
+                ('subdirs', models.JSONField(blank=True, default=list)),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text="Relative to MEDIA_ROOT, '/' separated", max_length=500, unique=True)),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('directory', models.CharField(db_index=True, max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('mtime', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['path'],
+            },
+        ),
+    ]
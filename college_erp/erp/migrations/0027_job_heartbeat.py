@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0026_mediadirectory_mediafile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('fee_import', 'Fee Import'), ('fees_report', 'Fees Report'), ('no_dues_batch', 'No Dues Certificates'), ('ats_score', 'ATS Scoring')], max_length=30),
+        ),
+    ]
@@ -1,6 +1,20 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Case, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+# Lower mark bound for each grade point, highest first (mirrors Student.get_grade_point)
+GRADE_POINT_BANDS = [(90, 10), (80, 9), (70, 8), (60, 7), (50, 6), (40, 5)]
+
+
+def grade_point_expression(field='total_marks'):
+    """Database-side equivalent of Student.get_grade_point for use in annotations/aggregates"""
+    return Case(
+        *[When(**{f'{field}__gte': marks}, then=Value(point)) for marks, point in GRADE_POINT_BANDS],
+        default=Value(0),
+        output_field=models.IntegerField()
+    )
 
 class Department(models.Model):
     name = models.CharField(max_length=100)
@@ -122,40 +136,59 @@ class Student(models.Model):
         return f"{self.roll_number} - {self.user.get_full_name()}"
     
     def calculate_sgpa(self):
-        enrollments = SubjectEnrollment.objects.filter(student=self, subject__semester=self.semester)
-        total_credits = 0
-        weighted_sum = 0
-        
-        for enrollment in enrollments:
-            if enrollment.total_marks is not None:
-                grade_point = self.get_grade_point(enrollment.total_marks)
-                total_credits += enrollment.subject.credits
-                weighted_sum += grade_point * enrollment.subject.credits
-        
-        return round(weighted_sum / total_credits, 2) if total_credits > 0 else 0
+        return self.calculate_gpa()[0]
     
     def calculate_cgpa(self):
-        enrollments = SubjectEnrollment.objects.filter(student=self, subject__semester__lte=self.semester)
-        total_credits = 0
-        weighted_sum = 0
+        return self.calculate_gpa()[1]
+    
+    def calculate_gpa(self):
+        """Returns (sgpa, cgpa) computed with a single aggregate query over the student's enrollments"""
+        sgpa, cgpa = Student.calculate_cohort_gpa(Student.objects.filter(pk=self.pk)).get(self.pk, (0, 0))
+        return sgpa or 0, cgpa
+    
+    @staticmethod
+    def calculate_cohort_gpa(students):
+        """
+        Computes SGPA and CGPA for every student in ``students`` with one
+        grouped aggregate query. Grade-point banding is done in the database
+        (see grade_point_expression) and weighted by subject credits.
         
-        for enrollment in enrollments:
-            if enrollment.total_marks is not None:
-                grade_point = self.get_grade_point(enrollment.total_marks)
-                total_credits += enrollment.subject.credits
-                weighted_sum += grade_point * enrollment.subject.credits
+        Returns:
+            dict: {student_id: (sgpa, cgpa)}; students without graded subjects are
+            omitted and sgpa is None for students without graded subjects in
+            their current semester
+        """
+        current = Q(subject__semester=F('student__semester'))
+        up_to_current = Q(subject__semester__lte=F('student__semester'))
+        weighted = ExpressionWrapper(grade_point_expression() * F('subject__credits'), output_field=models.IntegerField())
         
-        return round(weighted_sum / total_credits, 2) if total_credits > 0 else 0
+        rows = SubjectEnrollment.objects.filter(
+            student__in=students,
+            total_marks__isnull=False
+        ).values('student_id').annotate(
+            sem_credits=Sum('subject__credits', filter=current),
+            sem_weighted=Sum(weighted, filter=current),
+            cum_credits=Sum('subject__credits', filter=up_to_current),
+            cum_weighted=Sum(weighted, filter=up_to_current),
+        ).order_by()
+        
+        def gpa(weighted_sum, credits):
+            return round(weighted_sum / credits, 2) if credits else 0
+        
+        return {
+            row['student_id']: (
+                gpa(row['sem_weighted'], row['sem_credits']) if row['sem_credits'] is not None else None,
+                gpa(row['cum_weighted'], row['cum_credits']),
+            )
+            for row in rows
+        }
     
     @staticmethod
     def get_grade_point(marks):
-        if marks >= 90: return 10
-        elif marks >= 80: return 9
-        elif marks >= 70: return 8
-        elif marks >= 60: return 7
-        elif marks >= 50: return 6
-        elif marks >= 40: return 5
-        else: return 0
+        for lower_bound, grade_point in GRADE_POINT_BANDS:
+            if marks >= lower_bound:
+                return grade_point
+        return 0
 
 class SubjectEnrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -213,6 +246,28 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.student.roll_number} - {self.subject.code} - {self.date}"
 
+
+class AttendanceSummary(models.Model):
+    """Materialized attendance counts per (student, subject), kept current whenever Attendance is written."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='attendance_summaries')
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('student', 'subject')
+    
+    def __str__(self):
+        return f"{self.student.roll_number} - {self.subject.code}: {self.present}/{self.total}"
+    
+    @property
+    def absent(self):
+        return self.total - self.present
+    
+    @property
+    def percentage(self):
+        return round((self.present / self.total * 100), 2) if self.total > 0 else 0
+
 class Notice(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -238,11 +293,106 @@ class Resume(models.Model):
     tenth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     twelfth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now=True)
+    # SHA-256 of the scored file; points at the ResumeText cache entry
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Scoring runs in the background job queue; 'pending' until the worker fills in ats_score
+    ATS_STATUS_CHOICES = [
+        ('', 'Not scored'),
+        ('pending', 'Scoring'),
+        ('done', 'Scored'),
+        ('failed', 'Failed'),
+    ]
+    ats_status = models.CharField(max_length=10, choices=ATS_STATUS_CHOICES, blank=True, default='')
 
     def __str__(self):
         return f"{self.student.roll_number} - Resume"
 
 
+class ResumeText(models.Model):
+    """Normalized text extracted from a resume PDF, keyed by the SHA-256 of the file bytes.
+
+    Identical files share one row, and a file is only parsed again when its bytes change.
+    ``analysis`` caches the JD-independent part of the ATS score (see erp/ats.py).
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    text = models.TextField(blank=True)
+    analysis = models.JSONField(default=dict, blank=True)
+    extracted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({len(self.text)} chars)"
+
+    def get_analysis(self):
+        """The stored analysis, recomputed from the cached text if the keyword tables changed since."""
+        from .ats import ANALYZER_VERSION, analyze_text
+
+        if self.analysis.get('version') != ANALYZER_VERSION:
+            self.analysis = analysis_to_json(analyze_text(self.text))
+            ResumeText.objects.filter(pk=self.pk).update(analysis=self.analysis)
+        return self.analysis
+
+
+def analysis_to_json(analysis):
+    """Make an ats.analyze_text() result storable in a JSONField."""
+    from .ats import ANALYZER_VERSION
+
+    return {**analysis, 'keywords': sorted(analysis['keywords']), 'version': ANALYZER_VERSION}
+
+
+class PlacementDrive(models.Model):
+    """A recruiting drive with one job description that every resume can be scored against."""
+    name = models.CharField(max_length=200, unique=True)
+    job_description = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    scored_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DriveScore(models.Model):
+    """ATS score of one resume for one placement drive (kept apart from Resume.ats_score)."""
+    drive = models.ForeignKey(PlacementDrive, on_delete=models.CASCADE, related_name='scores')
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='drive_scores')
+    score = models.FloatField()
+    breakdown = models.JSONField(default=dict, blank=True)
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('drive', 'resume')
+        ordering = ['-score']
+
+    def __str__(self):
+        return f"{self.resume.student.roll_number} - {self.drive.name}: {self.score}"
+
+
+class MediaDirectory(models.Model):
+    """A directory under MEDIA_ROOT as of the last media index refresh (see erp/media_index.py)."""
+    path = models.CharField(max_length=500, unique=True, help_text="Relative to MEDIA_ROOT, '' for the root")
+    # st_mtime_ns of the directory when it was last listed; unchanged means no entries were added or removed
+    mtime_ns = models.BigIntegerField()
+    subdirs = models.JSONField(default=list, blank=True)
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path or '/'
+
+
+class MediaFile(models.Model):
+    """One file under MEDIA_ROOT, indexed by basename so moved uploads can be found without walking the tree."""
+    path = models.CharField(max_length=500, unique=True, help_text="Relative to MEDIA_ROOT, '/' separated")
+    name = models.CharField(max_length=255, db_index=True)
+    directory = models.CharField(max_length=500, db_index=True)
+    size = models.BigIntegerField(default=0)
+    mtime = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['path']
+
+    def __str__(self):
+        return self.path
+
+
 class Exam(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -296,6 +446,8 @@ class SemesterPerformance(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semester_performances')
     semester = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(8)])
     sgpa = models.DecimalField(max_digits=4, decimal_places=2, validators=[MinValueValidator(0), MaxValueValidator(10)])
+    # Cumulative GPA up to this semester; filled in by the process_results command
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(0), MaxValueValidator(10)])
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -305,6 +457,30 @@ class SemesterPerformance(models.Model):
     def __str__(self):
         return f"{self.student.roll_number} - Sem {self.semester}: {self.sgpa}"
 
+class FeesQuerySet(models.QuerySet):
+    def with_balances(self):
+        """
+        Annotates each fee with ``annotated_paid``, ``annotated_total`` and
+        ``annotated_remaining`` (correlated Subquery/Sum over FeePayment), so the
+        amount_paid/total_amount/amount_remaining properties need no extra queries.
+        """
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+        paid = FeePayment.objects.filter(fee=OuterRef('pk')).order_by().values('fee').annotate(
+            paid=Sum('amount')
+        ).values('paid')
+        total = ExpressionWrapper(F('amount') + F('fine') - F('rewards'), output_field=money)
+        return self.annotate(
+            annotated_paid=Coalesce(Subquery(paid, output_field=money), Value(0), output_field=money),
+            annotated_total=total,
+        ).annotate(
+            annotated_remaining=Case(
+                When(annotated_total__gt=F('annotated_paid'), then=F('annotated_total') - F('annotated_paid')),
+                default=Value(0),
+                output_field=money
+            )
+        )
+
+
 class Fees(models.Model):
     TITLE_CHOICES = [
         ('tuition', 'Tuition Fee'),
@@ -328,6 +504,8 @@ class Fees(models.Model):
     verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='verified_fees')
     verified_on = models.DateTimeField(null=True, blank=True)
     
+    objects = FeesQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('student', 'title')
     
@@ -340,11 +518,18 @@ class Fees(models.Model):
     
     @property
     def amount_paid(self):
+        # Prefer values from Fees.objects.with_balances() or prefetch_related('payments')
+        if hasattr(self, 'annotated_paid'):
+            return self.annotated_paid
+        if 'payments' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum(p.amount for p in self.payments.all())
         payments = FeePayment.objects.filter(fee=self)
         return sum(p.amount for p in payments)
     
     @property
     def amount_remaining(self):
+        if hasattr(self, 'annotated_remaining'):
+            return self.annotated_remaining
         return max(0, self.total_amount - self.amount_paid)
 
 class FeePayment(models.Model):
@@ -376,6 +561,9 @@ class ImportLog(models.Model):
     updated_count = models.IntegerField(default=0)
     error_count = models.IntegerField(default=0)
     errors_preview = models.TextField(blank=True)
+    # Progress of streaming imports, updated after every chunk
+    rows_processed = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Import {self.uploaded_at.strftime('%Y-%m-%d %H:%M')} by {self.uploaded_by}"
@@ -396,4 +584,44 @@ class StudyMaterial(models.Model):
     
     def __str__(self):
         section_str = f" - Section {self.section}" if self.section else " - All Sections"
-        return f"{self.subject.code}: {self.title}{section_str}" 
\ No newline at end of file
+        return f"{self.subject.code}: {self.title}{section_str}" 
+
+class Job(models.Model):
+    """Long-running work (imports, reports, archives) queued in the database and executed by the run_jobs command."""
+    KIND_CHOICES = [
+        ('fee_import', 'Fee Import'),
+        ('fees_report', 'Fees Report'),
+        ('no_dues_batch', 'No Dues Certificates'),
+        ('ats_score', 'ATS Scoring'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    # Percentage complete (0-100) and a short human readable status line
+    progress = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
+    message = models.CharField(max_length=255, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', null=True, blank=True)
+    result_file = models.FileField(upload_to='jobs/results/', null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while the job runs; a stale heartbeat means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
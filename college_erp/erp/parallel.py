@@ -0,0 +1,26 @@
+"""
+Helpers for running ORM work from management commands in a process pool.
+
+This module deliberately avoids importing models at import time: worker
+processes (spawned on Windows/macOS) unpickle ``init_worker`` before Django is
+set up, so it must be importable on its own.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+
+def init_worker():
+    """Set up Django in a freshly started worker; DB connections open lazily per process."""
+    import django
+    django.setup()
+
+
+def process_pool(workers):
+    """
+    Returns a ProcessPoolExecutor whose workers each get their own database connection.
+    
+    The parent's connections are closed first so forked children never share a socket
+    with it; Django reconnects on the next query in every process.
+    """
+    from django.db import connections
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
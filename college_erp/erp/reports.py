@@ -0,0 +1,507 @@
+"""
+Report and archive builders shared by the views and the background job queue.
+
+Each builder writes to a binary file-like ``output`` so the same code can fill
+an HTTP response or a result file under MEDIA_ROOT.
+"""
+import array
+import copy
+import datetime
+import functools
+import glob
+import hashlib
+import io
+import itertools
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from .models import Fees
+
+
+class _PdfConcatenator:
+    """
+    Writes the pages of several PDFs to ``output`` as one document, part by part.
+
+    Every part is parsed with PyPDF2, its page objects are renumbered and
+    written out at once; only the byte offset of each written object and the
+    ids of the pages are kept (8 bytes apiece). Object 1 (catalog) and 2
+    (page tree) are written by ``close``, followed by the cross-reference table.
+    """
+    # Page attributes a page can inherit from the page tree
+    INHERITED = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+    def __init__(self, output):
+        self._output = output
+        self._position = 0
+        self._offsets = array.array('Q', [0, 0])
+        self._pages = array.array('Q')
+        self.write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+
+    def write(self, data):
+        self._output.write(data)
+        self._position += len(data)
+
+    def _write_object(self, number, obj):
+        self._offsets[number - 1] = self._position
+        self.write(f'{number} 0 obj\n'.encode())
+        obj.write_to_stream(self, None)
+        self.write(b'\nendobj\n')
+
+    def add(self, pdf_file):
+        """Append every page of the PDF in ``pdf_file``."""
+        from PyPDF2 import PdfReader
+        from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+        numbers = {}
+        pending = []
+
+        def reserve(ref):
+            self._offsets.append(0)
+            numbers[(ref.idnum, ref.generation)] = len(self._offsets)
+            return len(self._offsets)
+
+        def copy(obj):
+            if isinstance(obj, IndirectObject):
+                number = numbers.get((obj.idnum, obj.generation))
+                if number is None:
+                    number = reserve(obj)
+                    pending.append((number, obj.get_object()))
+                return IndirectObject(number, 0, None)
+            if isinstance(obj, StreamObject):
+                stream = type(obj)()
+                stream._data = obj._data
+                stream.update({key: copy(value) for key, value in obj.items()})
+                return stream
+            if isinstance(obj, DictionaryObject):
+                return DictionaryObject({key: copy(value) for key, value in obj.items()})
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(copy(value) for value in obj)
+            return obj
+
+        for page in PdfReader(pdf_file).pages:
+            attributes = dict(page)
+            parent = attributes.pop('/Parent', None)
+            while parent is not None:
+                parent = parent.get_object()
+                for key in self.INHERITED:
+                    if key in parent:
+                        attributes.setdefault(key, parent[key])
+                parent = parent.get('/Parent')
+
+            number = reserve(page.indirect_reference)
+            page_copy = DictionaryObject({key: copy(value) for key, value in attributes.items()})
+            page_copy[NameObject('/Parent')] = IndirectObject(2, 0, None)
+            self._write_object(number, page_copy)
+            self._pages.append(number)
+            while pending:
+                number, obj = pending.pop()
+                self._write_object(number, copy(obj))
+
+    def close(self):
+        """Write the catalog, the page tree and the cross-reference table."""
+        self._offsets[0] = self._position
+        self.write(b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n')
+        self._offsets[1] = self._position
+        self.write(f'2 0 obj\n<< /Type /Pages /Count {len(self._pages)} /Kids ['.encode())
+        for start in range(0, len(self._pages), 1000):
+            self.write(''.join(f' {number} 0 R' for number in self._pages[start:start + 1000]).encode())
+        self.write(b' ] >>\nendobj\n')
+
+        xref = self._position
+        self.write(f'xref\n0 {len(self._offsets) + 1}\n0000000000 65535 f \n'.encode())
+        for start in range(0, len(self._offsets), 1000):
+            self.write(''.join(f'{offset:010d} 00000 n \n' for offset in self._offsets[start:start + 1000]).encode())
+        self.write(f'trailer\n<< /Size {len(self._offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+
+
+def write_fees_report(output, progress=None, chunk_size=500, rows_per_table=40, rows_per_part=2000):
+    """
+    Write the college-wide fees report PDF to ``output``.
+
+    Fees are read with ``.iterator(chunk_size=...)`` and pre-annotated balances.
+    Every ``rows_per_part`` rows (in tables of ``rows_per_table``) are laid
+    out as a separate ReportLab document, whose pages are appended to
+    ``output`` before the next part is read; each part starts on a new page.
+    Memory is bounded by one part (a few MB at the default 2000 rows) plus
+    8 bytes per PDF object written, about 24 bytes per page.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.units import inch
+
+    styles = getSampleStyleSheet()
+
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=6,
+        alignment=1
+    )
+    header = ['Roll Number', 'Student Name', 'Fee Title', 'Amount', 'Fine', 'Rewards', 'Total', 'Paid', 'Remaining', 'Verified']
+    col_widths = [1.2*inch, 1.2*inch, 1*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.6*inch]
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ])
+
+    all_fees = Fees.objects.with_balances().select_related('student__user').order_by('student__roll_number', 'title')
+    total = all_fees.count() if progress else 0
+    rows_per_part = max(rows_per_table, rows_per_part - rows_per_part % rows_per_table)
+
+    def table_for(rows):
+        table = Table([header] + rows, colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        return table
+
+    rows = (
+        [
+            fee.student.roll_number,
+            fee.student.user.get_full_name(),
+            fee.get_title_display(),
+            f"₹{fee.amount}",
+            f"₹{fee.fine}",
+            f"₹{fee.rewards}",
+            f"₹{fee.total_amount}",
+            f"₹{fee.amount_paid}",
+            f"₹{fee.amount_remaining}",
+            "Yes" if fee.is_verified else "No"
+        ]
+        for fee in all_fees.iterator(chunk_size=chunk_size)
+    )
+
+    pdf = _PdfConcatenator(output)
+    done = 0
+    while True:
+        part = list(itertools.islice(rows, rows_per_part))
+        story = []
+        if not done:
+            story += [Paragraph("College Fees Report", title_style), Spacer(1, 0.2*inch)]
+            if not part:
+                story.append(Paragraph("No fees records found", styles['Normal']))
+        elif not part:
+            break
+        story += [table_for(part[i:i + rows_per_table]) for i in range(0, len(part), rows_per_table)]
+
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch).build(story)
+        pdf.add(buffer)
+        done += len(part) or 1
+        if progress and total:
+            progress(min(99, done * 100 // total), f'Rendered {min(done, total)} of {total} fee rows')
+        if len(part) < rows_per_part:
+            break
+    pdf.close()
+
+
+def filter_resumes(resumes, **filters):
+    """
+    Narrow a Resume queryset by department code, semester and ATS/10th/12th cut-offs
+    (see ``exports.filter_export`` for the accepted keys). Blank values are ignored.
+    """
+    from .exports import filter_export
+
+    return filter_export(resumes, filters, resume='')
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only sink for ZipFile that hands out what has been written so far.
+
+    It is not seekable, so ZipFile writes data descriptors after each member
+    instead of seeking back to patch local headers.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_resumes_zip(resumes, chunk_size=64 * 1024):
+    """
+    Yield a ZIP archive of ``resumes`` piece by piece for a StreamingHttpResponse.
+
+    PDFs are already compressed, so members are written with ZIP_STORED and each
+    file is copied in ``chunk_size`` blocks; peak memory is one block regardless of
+    how many resumes there are. Missing files are skipped.
+    """
+    resumes = resumes.exclude(resume_file='').exclude(resume_file__isnull=True).select_related('student')
+    sink = _ZipStream()
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+        for r in resumes.iterator(chunk_size=500):
+            file_path = os.path.join(settings.MEDIA_ROOT, r.resume_file.name)
+            if not os.path.isfile(file_path):
+                continue
+
+            # Use a filename inside zip that is informative: rollname_filename
+            student = getattr(r, 'student', None)
+            roll = student.roll_number if student else 'unknown'
+            info = zipfile.ZipInfo.from_file(file_path, f"{roll}_{os.path.basename(r.resume_file.name)}")
+            info.compress_type = zipfile.ZIP_STORED
+            try:
+                with open(file_path, 'rb') as src, zf.open(info, 'w') as dst:
+                    while True:
+                        block = src.read(chunk_size)
+                        if not block:
+                            break
+                        dst.write(block)
+                        yield sink.drain()
+            except OSError:
+                continue
+            yield sink.drain()
+    # Central directory is written when the archive is closed
+    yield sink.drain()
+
+
+# ============ No Dues Certificates ============
+
+NO_DUES_CACHE_DIR = 'certificates/no_dues'
+
+
+@functools.lru_cache(maxsize=None)
+def _no_dues_template():
+    """
+    Static parts of the no-dues certificate, built once per process: styles,
+    the title, table style and the signature block. Flowables are shallow-copied
+    per render so concurrent builds never share layout state.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import Paragraph, Spacer, TableStyle
+    from reportlab.lib.units import inch
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=14,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=6,
+        alignment=1
+    )
+    return {
+        'normal': styles['Normal'],
+        'header': [Paragraph("No Dues Certificate", title_style), Spacer(1, 0.1*inch)],
+        'outstanding': [
+            Paragraph("<b style='color:red;'>Status: Has Outstanding Fees</b>", styles['Normal']),
+            Spacer(1, 0.1*inch),
+        ],
+        'cleared': [
+            Paragraph("<b style='color:green;'>Status: No Outstanding Dues</b>", styles['Normal']),
+            Spacer(1, 0.2*inch),
+            Paragraph("This certificate certifies that the student has paid all outstanding fees.", styles['Normal']),
+        ],
+        'signature': [
+            Spacer(1, 0.3*inch),
+            Paragraph("_" * 50, styles['Normal']),
+            Paragraph("Administrator Signature", styles['Normal']),
+        ],
+        'table_style': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ef4444')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'col_widths': [2*inch, 1.5*inch, 1.5*inch, 1.5*inch],
+        'spacer': Spacer(1, 0.2*inch),
+    }
+
+
+def render_no_dues_certificate(student, fees, output, issued_on=None):
+    """
+    Render a no-dues certificate for ``student`` to ``output``.
+
+    ``fees`` should come from ``Fees.objects.with_balances()`` so no queries run here.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table
+    from reportlab.lib.units import inch
+
+    template = _no_dues_template()
+    issued_on = issued_on or datetime.date.today()
+    outstanding = [fee for fee in fees if fee.amount_remaining > 0]
+
+    # Student Details
+    student_details = f"""
+    <b>Roll Number:</b> {escape(student.roll_number)}<br/>
+    <b>Name:</b> {escape(student.user.get_full_name())}<br/>
+    <b>Department:</b> {escape(student.department.name if student.department else '')}<br/>
+    <b>Semester:</b> {student.semester}<br/>
+    <b>Date:</b> {issued_on.strftime('%d-%m-%Y')}<br/>
+    """
+    elements = [copy.copy(f) for f in template['header']]
+    elements.append(Paragraph(student_details, template['normal']))
+    elements.append(copy.copy(template['spacer']))
+
+    # Fees Summary
+    if outstanding:
+        elements.extend(copy.copy(f) for f in template['outstanding'])
+        data = [['Fee Title', 'Total Amount', 'Amount Paid', 'Amount Due']]
+        for fee in outstanding:
+            data.append([
+                fee.get_title_display(),
+                f"₹{fee.total_amount}",
+                f"₹{fee.amount_paid}",
+                f"₹{fee.amount_remaining}"
+            ])
+        table = Table(data, colWidths=template['col_widths'])
+        table.setStyle(template['table_style'])
+        elements.append(table)
+    else:
+        elements.extend(copy.copy(f) for f in template['cleared'])
+
+    elements.extend(copy.copy(f) for f in template['signature'])
+
+    doc = SimpleDocTemplate(output, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    doc.build(elements)
+
+
+def no_dues_state_hash(student, fees, issued_on):
+    """Hash of everything printed on the certificate; any change yields a new cache entry."""
+    parts = [
+        student.roll_number,
+        student.user.get_full_name(),
+        student.department.name if student.department else '',
+        str(student.semester),
+        issued_on.isoformat(),
+    ]
+    for fee in sorted(fees, key=lambda f: f.pk):
+        parts.append(f'{fee.pk}:{fee.title}:{fee.total_amount}:{fee.amount_paid}:{fee.amount_remaining}')
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def get_no_dues_certificate(student):
+    """
+    Return an open binary file of the student's no-dues PDF, rendering it only
+    when no cached copy exists for the current (student, fee-state) hash.
+
+    The file is opened here rather than by the caller, so a concurrent
+    ``invalidate_no_dues_certificates`` deleting the cached copy cannot fail
+    the download; the open handle stays readable after the unlink.
+    """
+    fees = list(Fees.objects.filter(student=student).with_balances())
+    issued_on = datetime.date.today()
+    cache_dir = os.path.join(settings.MEDIA_ROOT, NO_DUES_CACHE_DIR)
+    path = os.path.join(cache_dir, f'{student.pk}_{no_dues_state_hash(student, fees, issued_on)}.pdf')
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Render to a temporary name first so concurrent requests never serve a partial file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as output:
+        render_no_dues_certificate(student, fees, output, issued_on=issued_on)
+    certificate = open(tmp_path, 'rb')
+    os.replace(tmp_path, path)
+
+    # Older entries for this student are stale now
+    invalidate_no_dues_certificates(student.pk, keep=path)
+    return certificate
+
+
+def invalidate_no_dues_certificates(student_id, keep=None):
+    """Delete cached no-dues PDFs for a student (called when their Fees/FeePayment rows change)."""
+    for path in glob.glob(os.path.join(settings.MEDIA_ROOT, NO_DUES_CACHE_DIR, f'{student_id}_*.pdf')):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def render_no_dues_chunk(items, issued_on):
+    """
+    Worker entry point: render ``[(student, fees), ...]`` to ``[(roll_number, pdf_bytes), ...]``.
+
+    Instances arrive pickled with their balances already annotated, so workers
+    never touch the database.
+    """
+    rendered = []
+    for student, fees in items:
+        buffer = io.BytesIO()
+        render_no_dues_certificate(student, fees, buffer, issued_on=issued_on)
+        rendered.append((student.roll_number, buffer.getvalue()))
+    return rendered
+
+
+def write_no_dues_batch(output, students, fmt='zip', workers=1, chunk_size=50, progress=None):
+    """
+    Write no-dues certificates for every student in ``students`` to ``output``,
+    either as a ZIP of one PDF per student (``fmt='zip'``) or one merged PDF (``fmt='pdf'``).
+
+    Balances for the whole cohort come from a single ``with_balances()`` query;
+    rendering is spread over a process pool when ``workers > 1``.
+    Returns the number of certificates written.
+    """
+    from .parallel import process_pool
+
+    fees_by_student = {}
+    cohort_fees = Fees.objects.filter(student__in=students.values('pk')).with_balances().order_by('title')
+    for fee in cohort_fees:
+        fees_by_student.setdefault(fee.student_id, []).append(fee)
+
+    issued_on = datetime.date.today()
+    students = students.select_related('user', 'department').order_by('roll_number')
+    items = [(student, fees_by_student.get(student.pk, [])) for student in students]
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    total = len(items)
+
+    def rendered_chunks():
+        if workers > 1 and len(chunks) > 1:
+            with process_pool(workers) as pool:
+                # map() keeps roll-number order, which the merged PDF relies on
+                yield from pool.map(render_no_dues_chunk, chunks, [issued_on] * len(chunks))
+        else:
+            for chunk in chunks:
+                yield render_no_dues_chunk(chunk, issued_on)
+
+    done = 0
+    if fmt == 'pdf':
+        from PyPDF2 import PdfMerger
+
+        merger = PdfMerger()
+        for chunk in rendered_chunks():
+            for roll_number, pdf in chunk:
+                merger.append(io.BytesIO(pdf))
+            done += len(chunk)
+            if progress:
+                progress(min(99, done * 100 // total), f'Rendered {done} of {total} certificates')
+        merger.write(output)
+        merger.close()
+    else:
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for chunk in rendered_chunks():
+                for roll_number, pdf in chunk:
+                    zf.writestr(f'no_dues_{roll_number}.pdf', pdf)
+                done += len(chunk)
+                if progress:
+                    progress(min(99, done * 100 // total), f'Rendered {done} of {total} certificates')
+    return done
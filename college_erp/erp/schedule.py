@@ -0,0 +1,236 @@
+"""
+College-wide weekly schedule index and clash detection.
+
+``Schedule`` holds every scheduled lecture of every timetable in memory,
+indexed by section, by (day, lecture) and by teacher, so questions like
+"what is teacher X teaching on Tuesday L3" are dictionary lookups. It is
+loaded with a handful of queries (``Schedule.load``) or built from plain
+tuples, which is what the timetable solver does.
+
+Who teaches a lecture comes from ``Teacher.subjects``: a lecture of subject S
+needs one of S's teachers, and a teacher can only be in one place at a time.
+For every (day, lecture) the lectures running in parallel are matched to
+distinct teachers (bipartite matching); lectures that cannot be staffed are
+clashes. A clash is a ``subject`` clash when the subject runs in more
+sections at once than it has teachers, otherwise a ``teacher`` clash (the
+teachers it needs are taken by other subjects). Subjects without any teacher
+are reported separately by ``unstaffed``, not as clashes.
+"""
+from collections import namedtuple
+
+from .models import Subject, Teacher, Timetable, TimetableSlot
+
+DAYS = [code for code, _ in TimetableSlot.DAYS]
+
+# One scheduled lecture
+Lecture = namedtuple('Lecture', 'timetable_id day lecture subject_id')
+
+Clash = namedtuple('Clash', 'kind day lecture subject_id timetable_ids teacher_ids')
+
+
+class Schedule:
+    """
+    In-memory index of all timetables.
+
+    Args:
+        lectures: iterable of ``(timetable_id, day, lecture_number, subject_id)``
+        subject_teachers: mapping subject id -> iterable of teacher ids
+        timetable_labels, subject_labels, teacher_labels: optional id -> display
+            name mappings used by ``describe``
+    """
+
+    def __init__(self, lectures, subject_teachers, timetable_labels=None, subject_labels=None, teacher_labels=None):
+        self.subject_teachers = {sid: frozenset(tids) for sid, tids in subject_teachers.items()}
+        self.teacher_subjects = {}
+        for sid, tids in self.subject_teachers.items():
+            for tid in tids:
+                self.teacher_subjects.setdefault(tid, set()).add(sid)
+        self.timetable_labels = timetable_labels or {}
+        self.subject_labels = subject_labels or {}
+        self.teacher_labels = teacher_labels or {}
+
+        # timetable id -> {(day, lecture): subject id}
+        self.sections = {}
+        for timetable_id, day, lecture, subject_id in lectures:
+            if subject_id is not None:
+                self.sections.setdefault(timetable_id, {})[(day, lecture)] = subject_id
+        self._index()
+
+    @classmethod
+    def load(cls):
+        """
+        Build the schedule of the whole college from the database (five queries).
+
+        Slots of days a timetable does not have active any more are left out.
+        """
+        timetables = {t.pk: t for t in Timetable.objects.select_related('degree')}
+        active = {pk: set(t.get_active_days_list() or DAYS) for pk, t in timetables.items()}
+        lectures = [
+            Lecture(*row)
+            for row in TimetableSlot.objects.filter(subject__isnull=False).values_list(
+                'timetable_id', 'day', 'lecture_number', 'subject_id'
+            )
+            if row[1] in active.get(row[0], ())
+        ]
+
+        subject_teachers = {}
+        for teacher_id, subject_id in Teacher.subjects.through.objects.values_list('teacher_id', 'subject_id'):
+            subject_teachers.setdefault(subject_id, set()).add(teacher_id)
+        teacher_labels = {}
+        for pk, employee_id, first, last in Teacher.objects.values_list(
+            'id', 'employee_id', 'user__first_name', 'user__last_name'
+        ):
+            name = f'{first} {last}'.strip()
+            teacher_labels[pk] = f'{name} ({employee_id})' if name else employee_id
+        return cls(
+            lectures,
+            subject_teachers,
+            timetable_labels={pk: str(t) for pk, t in timetables.items()},
+            subject_labels=dict(Subject.objects.values_list('id', 'code')),
+            teacher_labels=teacher_labels,
+        )
+
+    def _index(self):
+        # (day, lecture) -> [(timetable id, subject id)]
+        self.cells = {}
+        for timetable_id, grid in self.sections.items():
+            for key, subject_id in grid.items():
+                self.cells.setdefault(key, []).append((timetable_id, subject_id))
+        # teacher id -> (day, lecture) -> [(timetable id, subject id)] the teacher could be giving
+        self.teachers = {}
+        for key, running in self.cells.items():
+            for timetable_id, subject_id in running:
+                for teacher_id in self.subject_teachers.get(subject_id, ()):
+                    self.teachers.setdefault(teacher_id, {}).setdefault(key, []).append((timetable_id, subject_id))
+
+    def replace_section(self, timetable_id, grid):
+        """Swap in a proposed ``{(day, lecture): subject id}`` grid for one timetable (before saving it)."""
+        self.replace_sections({timetable_id: grid})
+
+    def replace_sections(self, grids):
+        """``replace_section`` for ``{timetable id: grid}``, re-indexing once."""
+        for timetable_id, grid in grids.items():
+            self.sections[timetable_id] = {key: sid for key, sid in grid.items() if sid is not None}
+        self._index()
+
+    def teacher_occupancy(self, timetable_ids):
+        """
+        ``{teacher id: {day: {lecture numbers}}}`` taken by the lectures of ``timetable_ids``.
+
+        Every lecture time is matched like ``clashes`` does, so a subject with
+        several teachers occupies one of them; lectures that cannot be staffed
+        occupy nobody.
+        """
+        wanted = set(timetable_ids)
+        busy = {}
+        for (day, lecture), running in self.cells.items():
+            running = [(tt, sid) for tt, sid in running if tt in wanted and self.subject_teachers.get(sid)]
+            for teacher_id in self._match(running):
+                busy.setdefault(teacher_id, {}).setdefault(day, set()).add(lecture)
+        return busy
+
+    def teaching(self, teacher_id, day, lecture):
+        """``[(timetable id, subject id)]`` of the teacher's subjects running at that time (usually one)."""
+        return self.teachers.get(teacher_id, {}).get((day, lecture), [])
+
+    def teacher_week(self, teacher_id):
+        """``{(day, lecture): [(timetable id, subject id)]}`` for every lecture the teacher may give."""
+        return self.teachers.get(teacher_id, {})
+
+    def section(self, timetable_id):
+        """``{(day, lecture): subject id}`` of one timetable."""
+        return self.sections.get(timetable_id, {})
+
+    def _match(self, running):
+        """Kuhn's augmenting paths over ``[(timetable id, subject id)]``: ``{teacher id: index into running}``."""
+        assigned = {}
+
+        def assign(i, visited):
+            for teacher_id in self.subject_teachers[running[i][1]]:
+                if teacher_id in visited:
+                    continue
+                visited.add(teacher_id)
+                if teacher_id not in assigned or assign(assigned[teacher_id], visited):
+                    assigned[teacher_id] = i
+                    return True
+            return False
+
+        for i in range(len(running)):
+            assign(i, set())
+        return assigned
+
+    def _cell_clashes(self, day, lecture, timetable_id=None):
+        running = [(tt, sid) for tt, sid in self.cells.get((day, lecture), []) if self.subject_teachers.get(sid)]
+        if len(running) < 2:
+            return []
+        if timetable_id is not None:
+            # Matched last, the timetable's lecture stays unstaffed exactly when it
+            # adds to the cell's deficit (the rest is already a maximum matching)
+            running.sort(key=lambda item: item[0] == timetable_id)
+
+        assigned = self._match(running)
+        staffed = set(assigned.values())
+        unstaffed = [i for i in range(len(running)) if i not in staffed]
+        if not unstaffed:
+            return []
+
+        per_subject = {}
+        for tt, subject_id in running:
+            per_subject.setdefault(subject_id, []).append(tt)
+        clashes = []
+        reported = set()
+        for i in unstaffed:
+            if timetable_id is not None and running[i][0] != timetable_id:
+                continue
+            subject_id = running[i][1]
+            teachers = self.subject_teachers[subject_id]
+            if len(per_subject[subject_id]) > len(teachers):
+                if subject_id in reported:
+                    continue
+                reported.add(subject_id)
+                clashes.append(Clash(
+                    'subject', day, lecture, subject_id, tuple(sorted(per_subject[subject_id])), tuple(sorted(teachers))
+                ))
+            else:
+                # Every teacher of the subject is busy with another subject's lecture
+                others = sorted({running[assigned[tid]][0] for tid in teachers if tid in assigned} | {running[i][0]})
+                clashes.append(Clash('teacher', day, lecture, subject_id, tuple(others), tuple(sorted(teachers))))
+        return clashes
+
+    def clashes(self, timetable_id=None):
+        """
+        All clashes, ordered by day and lecture.
+
+        With ``timetable_id`` only its lecture times are checked and only the
+        clashes its own lectures add are returned: a lecture is reported when
+        the lectures at that time can staff one lecture fewer with it than
+        without it, whichever lecture ends up without a teacher.
+        """
+        if timetable_id is None:
+            keys = self.cells
+        else:
+            keys = self.sections.get(timetable_id, {})
+        found = []
+        for day, lecture in sorted(keys, key=lambda key: (DAYS.index(key[0]) if key[0] in DAYS else len(DAYS), key[1])):
+            found.extend(self._cell_clashes(day, lecture, timetable_id))
+        return found
+
+    def unstaffed(self):
+        """``{subject id: [timetable ids]}`` of scheduled subjects that no teacher has."""
+        found = {}
+        for timetable_id, grid in self.sections.items():
+            for subject_id in set(grid.values()):
+                if not self.subject_teachers.get(subject_id):
+                    found.setdefault(subject_id, []).append(timetable_id)
+        return found
+
+    def describe(self, clash):
+        """One line for a clash, e.g. 'Tue L3: CS301 in BTech - Section A, BTech - Section B but it has 1 teacher (...)'."""
+        when = f'{clash.day.title()} L{clash.lecture}'
+        subject = self.subject_labels.get(clash.subject_id, f'subject #{clash.subject_id}')
+        sections = ', '.join(self.timetable_labels.get(tt, f'timetable #{tt}') for tt in clash.timetable_ids)
+        teachers = ', '.join(self.teacher_labels.get(tid, f'teacher #{tid}') for tid in clash.teacher_ids)
+        if clash.kind == 'subject':
+            count = len(clash.teacher_ids)
+            return f'{when}: {subject} runs in {sections} at once but has {count} teacher{"s" if count != 1 else ""} ({teachers})'
+        return f'{when}: {subject} has no free teacher ({teachers} already teaching) - involves {sections}'
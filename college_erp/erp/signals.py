@@ -1,7 +1,24 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from .models import Student
-from .utils import auto_enroll_student_subjects
+from .models import Student, Attendance, Fees, FeePayment, Subject, Timetable, TimetableSlot
+from .reports import invalidate_no_dues_certificates
+from .timetables import clear_grid_cache, invalidate_section_grid, section_of
+from .utils import adjust_attendance_summary, auto_enroll_student_subjects
+
+
+def _enrollment_key(student):
+    """The fields that decide which subjects a student is enrolled in."""
+    try:
+        semester = int(student.semester) if student.semester else None
+    except (TypeError, ValueError):
+        semester = student.semester
+    return (student.department_id, semester)
+
+
+@receiver(post_init, sender=Student)
+def remember_enrollment_key(sender, instance, **kwargs):
+    """Remember the department/semester as loaded so saves can tell whether they changed."""
+    instance._saved_enrollment_key = _enrollment_key(instance)
 
 
 @receiver(post_save, sender=Student)
@@ -12,8 +29,101 @@ def enroll_student_in_subjects(sender, instance, created, **kwargs):
     2. A student's semester or department is updated
     
     This ensures students are always enrolled in the correct subjects
-    for their current semester and department.
+    for their current semester and department. Saves that only touch other
+    fields (phone, address, section...) skip the enrollment work entirely.
     """
+    key = _enrollment_key(instance)
+    if not created and key == getattr(instance, '_saved_enrollment_key', None):
+        return
+    instance._saved_enrollment_key = key
+    
     # Only enroll if student has both department and semester set
-    if instance.department and instance.semester:
+    if instance.department_id and instance.semester:
         auto_enroll_student_subjects(instance)
+
+
+def _attendance_counts(record):
+    """The ((student, subject), (total, present)) a stored attendance record contributes."""
+    return (record.student_id, record.subject_id), (1, int(bool(record.is_present)))
+
+
+@receiver(post_init, sender=Attendance)
+def remember_attendance_counts(sender, instance, **kwargs):
+    """Remember what a loaded record counts for so saves and deletes can apply the difference."""
+    instance._saved_attendance_counts = _attendance_counts(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def update_attendance_summary(sender, instance, created=False, **kwargs):
+    """
+    Keeps the AttendanceSummary rows in sync when a single attendance record is
+    saved or deleted (admin, forms, shell) by applying the change in counts.
+    
+    Bulk roster writes adjust the summary themselves in mark_attendance_roster.
+    """
+    changes = {}
+    old = None if created else getattr(instance, '_saved_attendance_counts', None)
+    if old is not None:
+        pair, (total, present) = old
+        changes[pair] = (-total, -present)
+    if kwargs['signal'] is post_save:
+        pair, (total, present) = _attendance_counts(instance)
+        old_total, old_present = changes.get(pair, (0, 0))
+        changes[pair] = (old_total + total, old_present + present)
+        instance._saved_attendance_counts = (pair, (total, present))
+    else:
+        instance._saved_attendance_counts = None
+    adjust_attendance_summary(changes)
+
+
+@receiver(post_save, sender=Fees)
+@receiver(post_delete, sender=Fees)
+def invalidate_fees_certificates(sender, instance, **kwargs):
+    """Drop the student's cached no-dues PDFs whenever one of their fee rows changes."""
+    invalidate_no_dues_certificates(instance.student_id)
+
+
+@receiver(post_save, sender=FeePayment)
+@receiver(post_delete, sender=FeePayment)
+def invalidate_payment_certificates(sender, instance, **kwargs):
+    """
+    Same as above for payments. Cache keys also include a hash of the fee state,
+    so rows written by bulk imports (which skip signals) can never serve a stale PDF.
+    """
+    student_id = Fees.objects.filter(pk=instance.fee_id).values_list('student_id', flat=True).first()
+    if student_id is not None:
+        invalidate_no_dues_certificates(student_id)
+
+
+@receiver(post_init, sender=Timetable)
+def remember_timetable_section(sender, instance, **kwargs):
+    """Remember the degree/section/semester as loaded so a save that moves the timetable drops both grids."""
+    instance._saved_section = section_of(instance)
+
+
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+def invalidate_timetable_grid(sender, instance, **kwargs):
+    """Drop the section's cached weekly grid when its timetable is saved or deleted."""
+    invalidate_section_grid(instance)
+    instance._saved_section = section_of(instance)
+
+
+@receiver(post_save, sender=TimetableSlot)
+@receiver(post_delete, sender=TimetableSlot)
+def invalidate_slot_grid(sender, instance, **kwargs):
+    """
+    Same for single slot edits (admin, shell). Grid saves from the weekly
+    timetable page use bulk_create and invalidate in save_weekly_slots.
+    """
+    timetable = Timetable.objects.filter(pk=instance.timetable_id).first()
+    if timetable is not None:
+        invalidate_section_grid(timetable)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subject_grids(sender, instance, **kwargs):
+    """Subject names are baked into every cached grid."""
+    clear_grid_cache()
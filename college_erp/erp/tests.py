@@ -1,3 +1,259 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from .models import (
+    AttendanceSummary, Department, SemesterPerformance, Student, Subject, SubjectEnrollment, Teacher
+)
+from .schedule import Schedule
+from .timetable_solver import solve, validate
+from .utils import mark_attendance_roster, sync_subject_enrollments
+
+
+class ProcessResultsTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Computer Science', code='CS')
+        self.earlier = Subject.objects.create(name='Programming', code='CS101', semester=1, department=self.department)
+        self.current = Subject.objects.create(name='Algorithms', code='CS201', semester=2, department=self.department)
+        self.student = Student.objects.create(
+            user=User.objects.create_user('cs001', password='x'),
+            roll_number='CS001',
+            department=self.department,
+            semester=2,
+            phone='0000000000',
+            date_of_birth=datetime.date(2004, 1, 1),
+            address='-',
+        )
+
+    def grade(self, subject, external_marks):
+        enrollment, _ = SubjectEnrollment.objects.get_or_create(student=self.student, subject=subject)
+        enrollment.external_marks = external_marks
+        enrollment.save()
+
+    def test_student_without_current_semester_grades_keeps_recorded_sgpa(self):
+        self.grade(self.earlier, 65)
+        SemesterPerformance.objects.create(student=self.student, semester=2, sgpa=Decimal('8.50'))
+
+        sgpa, cgpa = Student.calculate_cohort_gpa(Student.objects.all())[self.student.pk]
+        self.assertIsNone(sgpa)
+        self.assertGreater(cgpa, 0)
+
+        call_command('process_results', stdout=StringIO())
+        self.assertEqual(SemesterPerformance.objects.get(student=self.student, semester=2).sgpa, Decimal('8.50'))
+
+    def test_student_with_current_semester_grades_gets_snapshot(self):
+        self.grade(self.earlier, 65)
+        self.grade(self.current, 65)
+
+        call_command('process_results', stdout=StringIO())
+        performance = SemesterPerformance.objects.get(student=self.student, semester=2)
+        self.assertEqual(performance.sgpa, Decimal(str(self.student.calculate_sgpa())))
+        self.assertGreater(performance.sgpa, 0)
+
+
+class AttendanceRosterTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        self.subject = Subject.objects.create(name='Algorithms', code='CS201', semester=2, department=department)
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user('t001', password='x'),
+            employee_id='T001',
+            department=department,
+            phone='0000000000',
+        )
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(f'cs00{i}', password='x'),
+                roll_number=f'CS00{i}',
+                department=department,
+                semester=2,
+                phone='0000000000',
+                date_of_birth=datetime.date(2004, 1, 1),
+                address='-',
+            )
+            for i in range(1, 4)
+        ]
+
+    def totals(self):
+        return {
+            summary.student_id: (summary.total, summary.present)
+            for summary in AttendanceSummary.objects.filter(subject=self.subject)
+        }
+
+    def test_resubmitted_roster_moves_marks_without_counting_the_lecture_twice(self):
+        first, second, third = (student.pk for student in self.students)
+        stats = mark_attendance_roster(self.subject, '2024-01-08', [first, second], self.teacher)
+        self.assertEqual((stats['present'], stats['absent']), (2, 1))
+
+        mark_attendance_roster(self.subject, '2024-01-08', [third], self.teacher)
+        self.assertEqual(self.totals(), {first: (1, 0), second: (1, 0), third: (1, 1)})
+
+        mark_attendance_roster(self.subject, '2024-01-09', [first], self.teacher)
+        self.assertEqual(self.totals(), {first: (2, 1), second: (2, 0), third: (2, 1)})
+
+
+class EnrollStudentsCommandTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        self.subject = Subject.objects.create(name='Algorithms', code='CS201', semester=2, department=department)
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(f'cs00{i}', password='x'),
+                roll_number=f'CS00{i}',
+                department=department,
+                semester=2,
+                phone='0000000000',
+                date_of_birth=datetime.date(2004, 1, 1),
+                address='-',
+            )
+            for i in range(1, 3)
+        ]
+        # Saving a student enrolled them while the subject had no teacher yet
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user('t001', password='x'),
+            employee_id='T001',
+            department=department,
+            phone='0000000000',
+        )
+        self.teacher.subjects.add(self.subject)
+        SubjectEnrollment.objects.filter(student=self.students[0]).delete()
+
+    def enroll(self, *args):
+        out = StringIO()
+        call_command('enroll_students', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_lists_planned_enrollments_without_writing_them(self):
+        output = self.enroll('--dry-run')
+        self.assertIn('CS001: enroll in CS201 (teacher T001)', output)
+        self.assertIn('CS002: reassign CS201 to T001', output)
+        self.assertIn('1 new enrollments to create', output)
+        self.assertIn('1 enrollments to update', output)
+        self.assertEqual(
+            list(SubjectEnrollment.objects.values_list('student__roll_number', 'teacher')), [('CS002', None)]
+        )
+
+        self.assertNotIn('CS001:', self.enroll('--dry-run', '--quiet'))
+
+    def test_run_creates_and_reassigns_enrollments(self):
+        output = self.enroll()
+        self.assertIn('1 new enrollments created', output)
+        self.assertIn('1 enrollments updated', output)
+        self.assertNotIn('CS001:', output)
+        self.assertEqual(
+            sorted(SubjectEnrollment.objects.values_list('student__roll_number', 'teacher')),
+            [('CS001', self.teacher.pk), ('CS002', self.teacher.pk)]
+        )
+
+
+class EnrollmentSyncTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Computer Science', code='CS')
+        self.other_department = Department.objects.create(name='Electronics', code='EC')
+        Subject.objects.create(name='Algorithms', code='CS201', semester=2, department=self.department)
+        self.subject = Subject.objects.create(name='Compilers', code='CS301', semester=3, department=self.department)
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user('t001', password='x'),
+            employee_id='T001',
+            department=self.department,
+            phone='0000000000',
+        )
+        self.moved, self.transferred = (
+            Student.objects.create(
+                user=User.objects.create_user(roll_number.lower(), password='x'),
+                roll_number=roll_number,
+                department=department,
+                semester=2,
+                phone='0000000000',
+                date_of_birth=datetime.date(2004, 1, 1),
+                address='-',
+            )
+            for roll_number, department in (('CS001', self.department), ('EC001', self.other_department))
+        )
+
+    def test_department_and_semester_changes_are_created_or_reassigned(self):
+        # Saved: the signal enrolls the student in CS301 without a teacher
+        self.moved.semester = 3
+        self.moved.save()
+        self.assertTrue(SubjectEnrollment.objects.filter(student=self.moved, subject=self.subject).exists())
+
+        # Updated in bulk: no signal, so the sync has to create the enrollment
+        Student.objects.filter(pk=self.transferred.pk).update(department=self.department, semester=3)
+
+        self.assertEqual(sync_subject_enrollments(self.subject, self.teacher), (1, 1))
+        self.assertEqual(
+            sorted(SubjectEnrollment.objects.filter(subject=self.subject).values_list('student__roll_number', 'teacher')),
+            [('CS001', self.teacher.pk), ('EC001', self.teacher.pk)]
+        )
+        self.assertEqual(sync_subject_enrollments(self.subject, self.teacher), (0, 0))
+
+    def test_saves_that_keep_department_and_semester_skip_enrollment(self):
+        with mock.patch('erp.signals.auto_enroll_student_subjects') as auto_enroll:
+            self.moved.phone = '1111111111'
+            self.moved.save()
+            student = Student.objects.get(pk=self.moved.pk)
+            student.semester = '2'
+            student.save()
+            auto_enroll.assert_not_called()
+
+            student.semester = 3
+            student.save()
+            auto_enroll.assert_called_once_with(student)
+
+
+class ScheduleClashTests(SimpleTestCase):
+    # Subject A is taught by T1, B by T1 or T2 and C by T2
+    subject_teachers = {'A': {'T1'}, 'B': {'T1', 'T2'}, 'C': {'T2'}}
+
+    def test_edit_that_adds_a_deficit_clashes_whichever_lecture_is_left_unstaffed(self):
+        schedule = Schedule([('Z', 'mon', 1, 'B'), ('X', 'mon', 1, 'C')], self.subject_teachers)
+        self.assertEqual(schedule.clashes('Y'), [])
+
+        schedule.replace_section('Y', {('mon', 1): 'A'})
+        self.assertEqual(len(schedule.clashes()), 1)
+        clashes = schedule.clashes('Y')
+        self.assertEqual(len(clashes), 1)
+        self.assertEqual(clashes[0].subject_id, 'A')
+        self.assertIn('Y', clashes[0].timetable_ids)
+
+    def test_existing_clash_is_not_blamed_on_an_edit_that_does_not_add_to_it(self):
+        schedule = Schedule(
+            [('Z', 'mon', 1, 'A'), ('X', 'mon', 1, 'A'), ('Y', 'mon', 1, 'B')], self.subject_teachers
+        )
+        self.assertEqual(len(schedule.clashes()), 1)
+        self.assertEqual(schedule.clashes('Y'), [])
+        self.assertEqual(len(schedule.clashes('X')), 1)
+
+
+class TimetableSolverTests(SimpleTestCase):
+    days = ['mon', 'tue', 'wed']
+
+    def test_feasible_instance_is_complete_and_clash_free(self):
+        sections = {
+            'A': {'days': self.days, 'subjects': [('MATH', 4, False), ('PHY', 3, False), ('LAB', 3, True)]},
+            'B': {'days': self.days, 'subjects': [('MATH', 4, False), ('CHEM', 3, False)]},
+        }
+        subject_teachers = {'MATH': {'T1'}, 'PHY': {'T2'}, 'CHEM': {'T2'}, 'LAB': {'T3'}}
+        solution = solve(sections, subject_teachers, time_budget=5, teacher_busy={'T1': {'mon': [1, 2]}})
+
+        self.assertTrue(solution['complete'])
+        self.assertEqual(solution['unplaced'], [])
+        self.assertEqual(validate(solution, sections), [])
+        # Nothing is placed over T1's lectures elsewhere
+        for section in ('A', 'B'):
+            for lecture in (1, 2):
+                self.assertNotEqual(solution['grid'][section].get(('mon', lecture)), 'MATH')
+
+    def test_over_subscribed_teacher_leaves_lectures_unplaced_without_clashes(self):
+        # T1 would have to give 15 lectures in the 7 of a single day
+        sections = {section: {'days': ['mon'], 'subjects': [('MATH', 5, False)]} for section in 'ABC'}
+        solution = solve(sections, {'MATH': {'T1'}}, time_budget=1)
+
+        self.assertFalse(solution['complete'])
+        self.assertEqual(sum(lectures for _, _, lectures in solution['unplaced']), 8)
+        self.assertEqual(validate(solution, sections), [])
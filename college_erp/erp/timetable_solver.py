@@ -0,0 +1,353 @@
+"""
+Automatic weekly timetable generation for all sections at once.
+
+The input is each section's active days and subjects (with lectures per week
+and whether the subject is a lab) plus the teachers of every subject. Each
+(section, subject) pair is first given one teacher, balancing the teachers'
+weekly load; labs are taught in blocks of LAB_BLOCK consecutive lectures.
+
+Search is backtracking over "requirements" (the remaining lectures of one
+section's subject). Occupancy is kept as one bitmask of lectures per
+(section, day) and per (teacher, day), so the free start positions of a
+requirement on a day are a couple of integer operations. The search
+
+* picks the requirement with the fewest possible placements next (kept in
+  buckets by domain size, so the choice is O(1)),
+* tries placements on the days where the subject has the fewest lectures yet,
+  to spread it over the week (a section never gets more than
+  ``ceil(lectures / days)`` lectures of a subject on one day),
+* after every placement re-counts the placements left for the requirements
+  of the same section and the same teacher and undoes it at once if one of
+  them has none left (forward checking).
+
+When ``time_budget`` runs out the search stops backtracking and places what
+is left greedily; lectures that fit nowhere are returned in ``unplaced``.
+This module has no Django dependencies, so ``scripts/benchmark_timetable_solver.py``
+can import it directly; ``generate_timetables`` loads the input from the
+database and saves the result.
+"""
+import math
+import random
+import time
+
+LAB_BLOCK = 2
+LECTURES_PER_DAY = 7
+
+# The search restarts after this many backtracks, then after 1.5x as many more each time
+RESTART_BACKTRACKS = 500
+RESTART_GROWTH = 1.5
+
+# How often (in search steps) the time budget is checked
+_CLOCK_EVERY = 256
+
+
+class _Requirement:
+    __slots__ = ('index', 'section', 'subject', 'length', 'units', 'total', 'max_per_day', 'per_day', 'teacher', 'days')
+
+    def __init__(self, index, section, subject, length, units, teacher, days):
+        self.index = index
+        self.section = section
+        self.subject = subject
+        self.length = length
+        self.units = units
+        self.total = units
+        self.max_per_day = max(1, math.ceil(units / len(days))) if days else 0
+        self.per_day = dict.fromkeys(days, 0)
+        self.teacher = teacher
+        self.days = days
+
+
+def assign_teachers(sections, subject_teachers):
+    """
+    Give every (section, subject) pair one of the subject's teachers, least loaded first.
+
+    Returns ``{(section, subject): teacher or None}``.
+    """
+    load = {}
+    assigned = {}
+    pairs = sorted(
+        ((section, subject, lectures) for section, spec in sections.items() for subject, lectures, _ in spec['subjects']),
+        key=lambda pair: (len(subject_teachers.get(pair[1], ())), pair[1], pair[0])
+    )
+    for section, subject, lectures in pairs:
+        teachers = subject_teachers.get(subject)
+        if not teachers:
+            assigned[(section, subject)] = None
+            continue
+        teacher = min(teachers, key=lambda t: (load.get(t, 0), t))
+        load[teacher] = load.get(teacher, 0) + lectures
+        assigned[(section, subject)] = teacher
+    return assigned
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def solve(sections, subject_teachers, time_budget=30.0, lectures_per_day=LECTURES_PER_DAY, seed=0, teacher_busy=None):
+    """
+    Build a clash-free weekly timetable for every section.
+
+    Args:
+        sections: ``{section: {'days': [day, ...], 'subjects': [(subject, lectures_per_week, is_lab), ...]}}``
+            (section, subject and teacher keys can be any hashable; labs with
+            ``lectures_per_week`` n get ``ceil(n / LAB_BLOCK)`` blocks)
+        subject_teachers: ``{subject: iterable of teachers}``; subjects without
+            teachers are scheduled without a teacher constraint
+        time_budget: seconds of backtracking before the rest is placed greedily
+        seed: seeds the value order shuffling done after restarts
+        teacher_busy: ``{teacher: {day: iterable of lecture numbers}}`` the
+            teachers already give elsewhere (timetables that are not being
+            generated); nothing is placed over them
+
+    Returns:
+        dict with ``grid`` (``{section: {(day, lecture_number): subject}}``,
+        lecture numbers from 1), ``teachers`` (from ``assign_teachers``),
+        ``unplaced`` (``[(section, subject, lectures)]``), ``complete``,
+        ``timed_out``, ``backtracks``, ``restarts`` and ``elapsed`` (seconds)
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    deadline = started + time_budget
+    full = (1 << lectures_per_day) - 1
+    teachers = assign_teachers(sections, subject_teachers)
+
+    requirements = []
+    for section, spec in sections.items():
+        days = list(dict.fromkeys(spec['days']))
+        for subject, lectures, is_lab in spec['subjects']:
+            if lectures <= 0:
+                continue
+            length = LAB_BLOCK if is_lab else 1
+            units = math.ceil(lectures / length)
+            requirements.append(
+                _Requirement(len(requirements), section, subject, length, units, teachers[(section, subject)], days)
+            )
+
+    section_busy = {section: dict.fromkeys(spec['days'], 0) for section, spec in sections.items()}
+    fixed, teacher_busy = teacher_busy or {}, {}
+    by_section = {}
+    by_teacher = {}
+    for req in requirements:
+        by_section.setdefault(req.section, []).append(req)
+        if req.teacher is not None:
+            by_teacher.setdefault(req.teacher, []).append(req)
+            teacher_busy.setdefault(req.teacher, {})
+    for teacher, days in fixed.items():
+        if teacher in teacher_busy:
+            for day, lectures in days.items():
+                for lecture in lectures:
+                    if 1 <= lecture <= lectures_per_day:
+                        teacher_busy[teacher][day] = teacher_busy[teacher].get(day, 0) | 1 << (lecture - 1)
+
+    def free_starts(req, day):
+        busy = section_busy[req.section][day]
+        if req.teacher is not None:
+            busy |= teacher_busy[req.teacher].get(day, 0)
+        free = full & ~busy
+        starts = free
+        for offset in range(1, req.length):
+            starts &= free >> offset
+        return starts
+
+    def domain_size(req):
+        return sum(
+            _popcount(free_starts(req, day))
+            for day in req.days if req.per_day[day] < req.max_per_day
+        )
+
+    def candidates(req):
+        found = []
+        for day in req.days:
+            if req.per_day[day] >= req.max_per_day:
+                continue
+            starts = free_starts(req, day)
+            load = _popcount(section_busy[req.section][day])
+            start = 0
+            while starts:
+                if starts & 1:
+                    found.append((req.per_day[day], load, rng.random() if restarts else start, start, day))
+                starts >>= 1
+                start += 1
+        found.sort(key=lambda c: c[:3])
+        return [(day, start) for _, _, _, start, day in found]
+
+    def place(req, day, start):
+        block = ((1 << req.length) - 1) << start
+        section_busy[req.section][day] |= block
+        if req.teacher is not None:
+            teacher_busy[req.teacher][day] = teacher_busy[req.teacher].get(day, 0) | block
+        req.per_day[day] += 1
+        req.units -= 1
+
+    def unplace(req, day, start):
+        block = ((1 << req.length) - 1) << start
+        section_busy[req.section][day] &= ~block
+        if req.teacher is not None:
+            teacher_busy[req.teacher][day] &= ~block
+        req.per_day[day] -= 1
+        req.units += 1
+
+    # Open requirements bucketed by their number of possible placements
+    max_domain = lectures_per_day * max((len(spec['days']) for spec in sections.values()), default=0)
+    buckets = [set() for _ in range(max_domain + 1)]
+    size = {}
+
+    def rebucket(req):
+        old = size.get(req.index)
+        if old is not None:
+            buckets[old].discard(req.index)
+        if req.units > 0:
+            size[req.index] = new = domain_size(req)
+            buckets[new].add(req.index)
+        else:
+            size.pop(req.index, None)
+
+    def neighbours(req):
+        if req.teacher is None:
+            return by_section[req.section]
+        return by_section[req.section] + by_teacher[req.teacher]
+
+    # Requirements with nowhere to go even in an empty week (no active days) never enter the search
+    unplaced = []
+    for req in requirements:
+        rebucket(req)
+        if size[req.index] == 0:
+            buckets[0].discard(req.index)
+            del size[req.index]
+            unplaced.append((req.section, req.subject, req.units * req.length))
+            req.units = 0
+
+    placements = []     # (req, day, start) in placement order
+    stack = []          # per level: [req, options, next option index, placed]
+    backtracks = 0
+    restarts = 0
+    restart_at = RESTART_BACKTRACKS
+    steps = 0
+    timed_out = False
+
+    while True:
+        steps += 1
+        if steps % _CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            timed_out = True
+            break
+
+        if not stack or stack[-1][3]:
+            # Next level: the open requirement with the fewest placements left
+            bucket = next((bucket for bucket in buckets if bucket), None)
+            if bucket is None:
+                break
+            req = requirements[next(iter(bucket))]
+            stack.append([req, candidates(req), 0, False])
+
+        frame = stack[-1]
+        req, options = frame[0], frame[1]
+        while frame[2] < len(options):
+            day, start = options[frame[2]]
+            frame[2] += 1
+            place(req, day, start)
+            affected = {n.index: n for n in neighbours(req)}.values()
+            for n in affected:
+                rebucket(n)
+            if all(size.get(n.index) != 0 for n in affected):
+                placements.append((req, day, start))
+                frame[3] = True
+                break
+            unplace(req, day, start)
+            for n in affected:
+                rebucket(n)
+        if frame[3]:
+            continue
+
+        # Every option of this level failed: backtrack into the previous level's next option
+        stack.pop()
+        backtracks += 1
+        if not stack:
+            break
+        if backtracks >= restart_at:
+            # Stuck below an early bad choice: start over with shuffled value order
+            restarts += 1
+            restart_at = backtracks + int(RESTART_BACKTRACKS * RESTART_GROWTH ** restarts)
+            stack.clear()
+            while placements:
+                unplace(*placements.pop())
+            for req in requirements:
+                rebucket(req)
+            continue
+        prev, day, start = placements.pop()
+        unplace(prev, day, start)
+        for n in {n.index: n for n in neighbours(prev)}.values():
+            rebucket(n)
+        stack[-1][3] = False
+
+    # Budget exhausted (or the search proved the rest infeasible): place what fits, greedily
+    for req in sorted(requirements, key=lambda r: (size.get(r.index, 0), r.index)):
+        while req.units > 0:
+            options = candidates(req)
+            if not options:
+                # Relax the per-day spread before giving up on the lecture
+                limit, req.max_per_day = req.max_per_day, req.total
+                options = candidates(req)
+                req.max_per_day = limit
+            if not options:
+                unplaced.append((req.section, req.subject, req.units * req.length))
+                break
+            day, start = options[0]
+            place(req, day, start)
+            placements.append((req, day, start))
+
+    grid = {section: {} for section in sections}
+    for req, day, start in placements:
+        for lecture in range(start, start + req.length):
+            grid[req.section][(day, lecture + 1)] = req.subject
+
+    return {
+        'grid': grid,
+        'teachers': teachers,
+        'unplaced': unplaced,
+        'complete': not unplaced,
+        'timed_out': timed_out,
+        'backtracks': backtracks,
+        'restarts': restarts,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def validate(solution, sections):
+    """
+    Independent check of a ``solve`` result; returns a list of problems (empty when valid).
+
+    Checks that every section gets its lectures, labs sit in consecutive
+    blocks on one day, lectures only fall on active days and no teacher is
+    in two sections at the same time.
+    """
+    problems = []
+    teachers = solution['teachers']
+    unplaced = {(section, subject): lectures for section, subject, lectures in solution['unplaced']}
+    booked = {}
+    for section, spec in sections.items():
+        grid = solution['grid'].get(section, {})
+        active = set(spec['days'])
+        for (day, lecture), subject in grid.items():
+            if day not in active:
+                problems.append(f'{section}: {subject} on inactive day {day}')
+            teacher = teachers.get((section, subject))
+            if teacher is not None:
+                other = booked.setdefault((teacher, day, lecture), section)
+                if other != section:
+                    problems.append(f'teacher {teacher} in {other} and {section} on {day} L{lecture}')
+        for subject, lectures, is_lab in spec['subjects']:
+            cells = sorted(key for key, value in grid.items() if value == subject)
+            expected = math.ceil(lectures / LAB_BLOCK) * LAB_BLOCK if is_lab else lectures
+            expected -= unplaced.get((section, subject), 0)
+            if len(cells) != expected:
+                problems.append(f'{section}: {subject} has {len(cells)} lectures, expected {expected}')
+            if is_lab:
+                for day in {day for day, _ in cells}:
+                    numbers = [lecture for d, lecture in cells if d == day]
+                    if len(numbers) % LAB_BLOCK or any(
+                        numbers[i + 1] != numbers[i] + 1
+                        for i in range(0, len(numbers), LAB_BLOCK)
+                    ):
+                        problems.append(f'{section}: lab {subject} is not in blocks of {LAB_BLOCK} on {day}')
+    return problems
@@ -0,0 +1,208 @@
+"""
+Weekly timetable persistence.
+
+A weekly timetable is a grid of TimetableSlot rows, one per (day, lecture)
+of its active days. ``save_weekly_slots`` writes a whole posted grid at once:
+the subject ids are validated with one ``IN`` query, diffed against the
+existing slots in memory, and only the cells that changed are upserted with
+a single ``bulk_create``; slots of days that were switched off are removed
+with one delete.
+
+Students see their section's grid through ``section_grid_html``: the grid is
+rendered once per timetable version and kept in the ``timetables`` cache
+(see CACHES in settings), keyed by the timetable id and its ``updated_at``.
+A small per-section entry points at the current version, so every student of
+the section is served from the cache without a database query until the
+timetable, one of its slots or a subject changes.
+"""
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Subject, Timetable, TimetableSlot
+
+DAYS = [code for code, _ in TimetableSlot.DAYS]
+LECTURES = list(range(1, 8))
+
+GRID_CACHE = 'timetables'
+GRID_TEMPLATE = 'student/timetable_grid.html'
+
+
+def _parse_id(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def save_weekly_slots(timetable, days, cells):
+    """
+    Make ``timetable``'s slots match a submitted grid.
+
+    Args:
+        timetable: saved Timetable
+        days: day codes that are active; slots of any other day are deleted
+        cells: mapping ``(day, lecture_number) -> subject id`` (string or int;
+            blank, malformed or unknown ids leave the cell empty). Cells of
+            active days that are missing from it are stored empty as well.
+
+    Returns:
+        dict: ``written`` (slots created or changed), ``deleted``,
+        ``unchanged`` and ``invalid`` (submitted ids that matched no subject)
+    """
+    days = [day for day in DAYS if day in set(days)]
+    requested = {key: _parse_id(value) for key, value in cells.items()}
+    submitted = {sid for sid in requested.values() if sid is not None}
+    valid = set(Subject.objects.filter(id__in=submitted).values_list('id', flat=True)) if submitted else set()
+
+    wanted = {}
+    for day in days:
+        for lecture in LECTURES:
+            sid = requested.get((day, lecture))
+            wanted[(day, lecture)] = sid if sid in valid else None
+
+    existing = {
+        (day, lecture): (pk, subject_id)
+        for pk, day, lecture, subject_id in timetable.slots.values_list('id', 'day', 'lecture_number', 'subject_id')
+    }
+    changed = [
+        TimetableSlot(timetable=timetable, day=day, lecture_number=lecture, subject_id=subject_id)
+        for (day, lecture), subject_id in wanted.items()
+        if (day, lecture) not in existing or existing[(day, lecture)][1] != subject_id
+    ]
+    stale = [pk for key, (pk, _) in existing.items() if key not in wanted]
+
+    with transaction.atomic(savepoint=False):
+        if changed:
+            TimetableSlot.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['timetable', 'day', 'lecture_number'],
+                update_fields=['subject']
+            )
+        if stale:
+            TimetableSlot.objects.filter(pk__in=stale).delete()
+    invalidate_section_grid(timetable)
+
+    return {
+        'written': len(changed),
+        'deleted': len(stale),
+        'unchanged': len(wanted) - len(changed),
+        'invalid': len(submitted - valid),
+    }
+
+
+def grid_clashes(timetable, days, cells):
+    """
+    Clashes the submitted grid (same arguments as ``save_weekly_slots``) would
+    create with the other sections' timetables, as ``(schedule, clashes)``;
+    use ``schedule.describe(clash)`` for messages.
+    """
+    from .schedule import Schedule
+
+    grid = {
+        (day, lecture): _parse_id(cells.get((day, lecture)))
+        for day in days
+        for lecture in LECTURES
+    }
+    schedule = Schedule.load()
+    schedule.replace_section(timetable.pk, grid)
+    return schedule, schedule.clashes(timetable.pk)
+
+
+def _section_key(degree_id, section, semester):
+    return f'timetable-section:{degree_id}:{(section or "").upper()}:{semester}'
+
+
+def _grid_key(timetable_id, updated_at):
+    return f'timetable-grid:{timetable_id}:{updated_at.timestamp()}'
+
+
+def find_section_timetable(degree, section, semester):
+    """
+    The timetable of a degree/section/semester (section matched case-insensitively).
+
+    When several match, one that has slots saved wins, then the most recently updated.
+    """
+    return (
+        Timetable.objects.filter(degree=degree, section__iexact=section, semester=semester)
+        .annotate(has_slots=Exists(TimetableSlot.objects.filter(timetable=OuterRef('pk'))))
+        .order_by('-has_slots', '-updated_at')
+        .first()
+    )
+
+
+def grid_context(timetable):
+    """Template context for GRID_TEMPLATE: active days, lecture times and one row of subject names per day."""
+    days = timetable.get_active_days_list() or DAYS
+    names = {
+        (day, lecture): name
+        for day, lecture, name in timetable.slots.values_list('day', 'lecture_number', 'subject__name')
+    }
+    return {
+        'lectures': LECTURES,
+        'times': [getattr(timetable, f'lecture{lecture}') for lecture in LECTURES],
+        'table_rows': [
+            {'day': day, 'cells': [names.get((day, lecture)) for lecture in LECTURES]}
+            for day in days
+        ],
+    }
+
+
+def section_grid_html(degree_id, section, semester):
+    """
+    The rendered weekly grid for a section, or None if it has no timetable.
+
+    Cache hits need no database query; a miss looks the timetable up, renders
+    the grid and stores it under the timetable's current ``updated_at``.
+    """
+    cache = caches[GRID_CACHE]
+    section_key = _section_key(degree_id, section, semester)
+    version = cache.get(section_key)
+    if version is not None:
+        if not version:
+            return None
+        html = cache.get(_grid_key(*version))
+        if html is not None:
+            return mark_safe(html)
+
+    timetable = find_section_timetable(degree_id, section, semester)
+    if timetable is None:
+        cache.set(section_key, ())
+        return None
+    version = (timetable.pk, timetable.updated_at)
+    html = render_to_string(GRID_TEMPLATE, grid_context(timetable))
+    cache.set_many({section_key: version, _grid_key(*version): str(html)})
+    return mark_safe(html)
+
+
+def section_of(timetable):
+    """The (degree, section, semester) a timetable's grid is cached under."""
+    return (timetable.degree_id, timetable.section, timetable.semester)
+
+
+def invalidate_section_grid(timetable):
+    """
+    Drop a section's cached grid once the current transaction commits.
+
+    The grid itself is deleted too: slot edits do not always bump the
+    timetable's ``updated_at``, so its key alone does not prove freshness.
+    A timetable moved to another degree, section or semester also drops the
+    section it was loaded with (``_saved_section``, set by a post_init signal).
+    """
+    sections = {section_of(timetable), getattr(timetable, '_saved_section', None)}
+    keys = list({_section_key(*section) for section in sections if section})
+
+    def delete():
+        cache = caches[GRID_CACHE]
+        versions = cache.get_many(keys)
+        cache.delete_many(keys + [_grid_key(*version) for version in versions.values() if version])
+
+    transaction.on_commit(delete)
+
+
+def clear_grid_cache():
+    """Drop every cached grid (subject names appear in all of them)."""
+    transaction.on_commit(caches[GRID_CACHE].clear)
@@ -101,4 +101,9 @@ urlpatterns = [
     
     # Student Study Materials
     path('student/study-materials/', views.student_study_materials, name='student_study_materials'),
+    
+    # Background jobs
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/progress/', views.job_progress, name='job_progress'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
 ]
\ No newline at end of file
@@ -1,132 +1,165 @@
-import PyPDF2
 import io
-import re
-from .models import Attendance
+import time
+
+from django.db import DatabaseError, connection, transaction
+
+from .ats import analyze_text, extract_text, job_description_skills, normalize_text, score_analysis
+from .models import Attendance, AttendanceSummary
 
 def calculate_ats_score(resume_file, job_description=None):
-    """Enhanced ATS score calculation based on multiple criteria.
+    """ATS score (0-100) of a PDF resume; see erp/ats.py for the scoring rules.
+
+    The PDF is only parsed if its bytes have not been seen before (see get_resume_text).
 
     Args:
         resume_file: file-like object for a PDF resume (readable)
         job_description: optional string containing the job description to compare against
     """
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(resume_file.read()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        
-        text_lower = text.lower()
-        score = 0
-        max_score = 100
-        
-        # 1. Technical Skills (30 points)
-        technical_skills = {
-            'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript'],
-            'web': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring', 'asp.net'],
-            'database': ['sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'redis', 'sqlite', 'dynamodb'],
-            'devops': ['docker', 'kubernetes', 'jenkins', 'git', 'github', 'gitlab', 'ci/cd', 'aws', 'azure', 'gcp'],
-            'data': ['machine learning', 'deep learning', 'data science', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn']
-        }
-        
-        skills_found = set()
-        for category, skills in technical_skills.items():
-            for skill in skills:
-                if skill in text_lower:
-                    skills_found.add(skill)
-        
-        # Award points based on unique skills found (up to 30 points)
-        technical_score = min(len(skills_found) * 2, 30)
-        score += technical_score
-
-        # 1.b Job Description match (optional) - bonus up to 20 points
-        jd_score = 0
-        if job_description:
-            jd_text = job_description.lower()
-            jd_skills = set()
-            for category, skills in technical_skills.items():
-                for skill in skills:
-                    if ' ' in skill:
-                        if skill in jd_text:
-                            jd_skills.add(skill)
-                    else:
-                        if re.search(r"\b" + re.escape(skill) + r"\b", jd_text):
-                            jd_skills.add(skill)
-
-            # if JD specified and it has skills, compute overlap
-            if jd_skills:
-                matched = skills_found.intersection(jd_skills)
-                try:
-                    ratio = len(matched) / len(jd_skills)
-                except Exception:
-                    ratio = 0
-                jd_score = min(round(ratio * 20), 20)
-                score += jd_score
-        
-        # 2. Contact Information (10 points)
-        contact_score = 0
-        if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text):
-            contact_score += 5  # Email found
-        if re.search(r'\b\d{10}\b|\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', text):
-            contact_score += 5  # Phone number found
-        score += contact_score
-        
-        # 3. Education (15 points)
-        education_keywords = ['bachelor', 'master', 'phd', 'b.tech', 'm.tech', 'bca', 'mca', 'b.e', 'm.e', 
-                             'degree', 'diploma', 'university', 'college', 'cgpa', 'gpa', 'percentage']
-        education_score = 0
-        for keyword in education_keywords:
-            if keyword in text_lower:
-                education_score += 2
-                if education_score >= 15:
-                    break
-        score += min(education_score, 15)
-        
-        # 4. Experience/Projects (20 points)
-        experience_keywords = ['experience', 'worked', 'developed', 'implemented', 'designed', 'built',
-                              'project', 'internship', 'achievement', 'accomplishment', 'responsible for']
-        experience_count = sum(1 for keyword in experience_keywords if keyword in text_lower)
-        experience_score = min(experience_count * 2, 20)
-        score += experience_score
-        
-        # 5. Soft Skills (10 points)
-        soft_skills = ['leadership', 'communication', 'teamwork', 'problem solving', 'analytical',
-                      'collaboration', 'adaptability', 'time management', 'critical thinking']
-        soft_skills_count = sum(1 for skill in soft_skills if skill in text_lower)
-        soft_skills_score = min(soft_skills_count * 2, 10)
-        score += soft_skills_score
-        
-        # 6. Certifications (10 points)
-        certification_keywords = ['certified', 'certification', 'certificate', 'aws certified',
-                                 'google cloud', 'microsoft certified', 'coursera', 'udemy']
-        cert_count = sum(1 for keyword in certification_keywords if keyword in text_lower)
-        cert_score = min(cert_count * 3, 10)
-        score += cert_score
-        
-        # 7. Formatting and Structure (5 points)
-        format_score = 0
-        if len(text) > 200:  # Reasonable length
-            format_score += 2
-        if any(section in text_lower for section in ['experience', 'education', 'skills', 'projects']):
-            format_score += 3
-        score += format_score
-        
-        return min(round(score), max_score)
+        return score_resume_text(get_resume_text(resume_file), job_description)
     except Exception as e:
         return 0
 
+
+def score_resume_text(resume_text, job_description=None):
+    """ATS score (0-100) of a cached ResumeText against an optional job description."""
+    return score_analysis(resume_text.get_analysis(), job_description_skills(job_description))['score']
+
+
+def enqueue_ats_scoring(resume, user=None):
+    """Queue background ATS scoring for a resume unless a job for it is already waiting."""
+    from .jobs import enqueue
+    from .models import Job
+    
+    waiting = Job.objects.filter(kind='ats_score', status='queued', params__resume_id=resume.pk).first()
+    return waiting or enqueue('ats_score', user=user, params={'resume_id': resume.pk})
+
+
+def get_resume_text(resume_file):
+    """
+    Returns the ResumeText cache row for a PDF file object, keyed by the SHA-256 of its bytes.
+    
+    Text extraction and keyword analysis only run on a cache miss; re-scoring an
+    unchanged file against a new job description reuses the stored result.
+    """
+    import hashlib
+    from .models import ResumeText, analysis_to_json
+    
+    data = resume_file.read()
+    if hasattr(resume_file, 'seek'):
+        # Leave uploads rewound so they can still be saved to storage
+        resume_file.seek(0)
+    content_hash = hashlib.sha256(data).hexdigest()
+    cached = ResumeText.objects.filter(content_hash=content_hash).first()
+    if cached is not None:
+        return cached
+    
+    text = normalize_text(extract_text(io.BytesIO(data)))
+    cached, _ = ResumeText.objects.get_or_create(
+        content_hash=content_hash,
+        defaults={'text': text, 'analysis': analysis_to_json(analyze_text(text))}
+    )
+    return cached
+
 def get_attendance_percentage(student, subject=None):
-    """Calculate attendance percentage for a student"""
+    """Calculate attendance percentage for a student from the materialized AttendanceSummary rows"""
+    from django.db.models import Sum
+    
+    summaries = AttendanceSummary.objects.filter(student=student)
     if subject:
-        total = Attendance.objects.filter(student=student, subject=subject).count()
-        present = Attendance.objects.filter(student=student, subject=subject, is_present=True).count()
-    else:
-        total = Attendance.objects.filter(student=student).count()
-        present = Attendance.objects.filter(student=student, is_present=True).count()
+        summaries = summaries.filter(subject=subject)
+    counts = summaries.aggregate(total=Sum('total'), present=Sum('present'))
+    total = counts['total'] or 0
+    present = counts['present'] or 0
     
     return round((present / total * 100), 2) if total > 0 else 0
 
 
+def get_attendance_summaries(student_ids=None, subject_ids=None):
+    """
+    Loads AttendanceSummary rows in one query.
+    
+    Returns:
+        dict: {(student_id, subject_id): AttendanceSummary}
+    """
+    summaries = AttendanceSummary.objects.all()
+    if student_ids is not None:
+        summaries = summaries.filter(student_id__in=student_ids)
+    if subject_ids is not None:
+        summaries = summaries.filter(subject_id__in=subject_ids)
+    return {(s.student_id, s.subject_id): s for s in summaries}
+
+
+def refresh_attendance_summary():
+    """
+    Recomputes every AttendanceSummary row from Attendance with a single
+    GROUP BY and writes them back with one bulk upsert.
+    
+    Attendance writes keep the summary current with adjust_attendance_summary;
+    this full recount is what the rebuild_attendance_summary command runs to
+    repair drift (raw SQL edits, restored backups).
+    
+    Returns:
+        int: number of summary rows written
+    """
+    from django.db.models import Count, Q
+    
+    rows = Attendance.objects.values('student_id', 'subject_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(is_present=True))
+    ).order_by()
+    summaries = [
+        AttendanceSummary(
+            student_id=row['student_id'],
+            subject_id=row['subject_id'],
+            total=row['total'],
+            present=row['present']
+        )
+        for row in rows
+    ]
+    
+    with transaction.atomic():
+        # Replace the whole table so pairs whose attendance disappeared are dropped too
+        AttendanceSummary.objects.all().delete()
+        AttendanceSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def adjust_attendance_summary(changes):
+    """
+    Applies attendance count changes to AttendanceSummary in place.
+    
+    ``changes`` maps ``(student_id, subject_id)`` to ``(total delta, present
+    delta)``. Missing summary rows are created first, then pairs with the same
+    subject and deltas share one ``F()`` UPDATE, so a roster costs a handful of
+    statements however large the class is.
+    """
+    from django.db.models import F
+    
+    groups = {}
+    for (student_id, subject_id), (total, present) in changes.items():
+        if total or present:
+            groups.setdefault((subject_id, total, present), []).append(student_id)
+    if not groups:
+        return
+    
+    with transaction.atomic():
+        AttendanceSummary.objects.bulk_create(
+            [
+                AttendanceSummary(student_id=student_id, subject_id=subject_id)
+                for (subject_id, total, _), student_ids in groups.items() if total > 0
+                for student_id in student_ids
+            ],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        for (subject_id, total, present), student_ids in groups.items():
+            AttendanceSummary.objects.filter(subject_id=subject_id, student_id__in=student_ids).update(
+                total=F('total') + total,
+                present=F('present') + present
+            )
+
+
 def auto_enroll_student_subjects(student):
     """
     Automatically enrolls a student in all subjects for their department and semester.
@@ -138,44 +171,351 @@ def auto_enroll_student_subjects(student):
     Returns:
         tuple: (number of enrollments created, number of enrollments updated)
     """
-    from .models import Subject, SubjectEnrollment, Teacher
-    
-    if not student.department or not student.semester:
+    if not student.department_id or not student.semester:
         return (0, 0)
     
-    # Get all subjects for the student's department and semester
-    subjects = Subject.objects.filter(
-        department=student.department,
-        semester=student.semester
-    )
+    return bulk_enroll_students([student])
+
+
+def bulk_enroll_students(students, dry_run=False, changes=None):
+    """
+    Enrolls many students in the subjects of their department and semester.
+    
+    Students are grouped by (department, semester); for each group the subject
+    list and the subject -> teacher map are resolved once, existing enrollments
+    are diffed in one query, and only the missing rows are written with
+    ``bulk_create``. Enrollments whose teacher changed are reassigned with one
+    UPDATE per teacher.
+    
+    Args:
+        students: iterable of Student objects (or a queryset)
+        dry_run: compute the diff only, without writing anything
+        changes: optional list that receives ``(student_id, subject_id, teacher_id,
+            created)`` for every enrollment to create (``created=True``) or reassign
+    
+    Returns:
+        tuple: (number of enrollments created, number of enrollments updated)
+    """
+    from django.db.models import Min
+    from .models import Subject, SubjectEnrollment, Teacher
+    
+    groups = {}
+    for student in students:
+        if student.department_id and student.semester:
+            groups.setdefault((student.department_id, int(student.semester)), []).append(student.id)
     
     created_count = 0
     updated_count = 0
     
-    for subject in subjects:
-        # Find a teacher who teaches this subject
-        teachers = Teacher.objects.filter(subjects=subject)
-        teacher = teachers.first() if teachers.exists() else None
+    for (department_id, semester), student_ids in groups.items():
+        subject_ids = list(
+            Subject.objects.filter(department_id=department_id, semester=semester).values_list('id', flat=True)
+        )
+        if not subject_ids:
+            continue
         
-        # Create or update enrollment
-        enrollment, created = SubjectEnrollment.objects.get_or_create(
-            student=student,
-            subject=subject,
-            defaults={'teacher': teacher}
+        # First teacher (lowest id) teaching each subject, as Teacher.objects.filter(subjects=...).first() would pick
+        teacher_for_subject = dict(
+            Teacher.subjects.through.objects.filter(subject_id__in=subject_ids)
+            .values('subject_id')
+            .annotate(teacher_id=Min('teacher_id'))
+            .values_list('subject_id', 'teacher_id')
         )
         
-        if created:
-            created_count += 1
-        else:
-            # Update teacher if needed and enrollment already existed
-            if teacher and enrollment.teacher != teacher:
-                enrollment.teacher = teacher
-                enrollment.save()
-                updated_count += 1
+        existing = {
+            (student_id, subject_id): (pk, teacher_id)
+            for pk, student_id, subject_id, teacher_id in SubjectEnrollment.objects.filter(
+                student_id__in=student_ids,
+                subject_id__in=subject_ids
+            ).values_list('id', 'student_id', 'subject_id', 'teacher_id')
+        }
+        
+        missing = []
+        reassign = {}
+        for student_id in student_ids:
+            for subject_id in subject_ids:
+                teacher_id = teacher_for_subject.get(subject_id)
+                current = existing.get((student_id, subject_id))
+                if current is None:
+                    missing.append(SubjectEnrollment(student_id=student_id, subject_id=subject_id, teacher_id=teacher_id))
+                elif teacher_id and current[1] != teacher_id:
+                    reassign.setdefault(teacher_id, []).append(current[0])
+                else:
+                    continue
+                if changes is not None:
+                    changes.append((student_id, subject_id, teacher_id, current is None))
+        
+        if dry_run:
+            created_count += len(missing)
+            updated_count += sum(len(ids) for ids in reassign.values())
+            continue
+        
+        with transaction.atomic():
+            if missing:
+                SubjectEnrollment.objects.bulk_create(missing, ignore_conflicts=True, batch_size=1000)
+                created_count += len(missing)
+            for teacher_id, enrollment_ids in reassign.items():
+                updated_count += SubjectEnrollment.objects.filter(id__in=enrollment_ids).update(teacher_id=teacher_id)
     
     return (created_count, updated_count)
 
 
+def sync_subject_enrollments(subject, teacher):
+    """
+    Makes sure every student of the subject's department/semester is enrolled
+    and that all enrollments for the subject point at ``teacher``.
+
+    Runs a fixed number of statements regardless of class size: one query for
+    the students and one for the existing enrollments, one bulk insert for the
+    students not enrolled yet and one bulk UPDATE for the teacher reassignment.
+
+    Returns:
+        tuple: (number of enrollments created, number of enrollments reassigned)
+    """
+    from .models import Student, SubjectEnrollment
+
+    enrolled = set(SubjectEnrollment.objects.filter(subject=subject).values_list('student_id', flat=True))
+    missing = [
+        sid for sid in Student.objects.filter(
+            department=subject.department,
+            semester=subject.semester
+        ).values_list('id', flat=True)
+        if sid not in enrolled
+    ]
+    if missing:
+        # bulk_create(ignore_conflicts=True) returns skipped rows too, so count from the keys read above
+        SubjectEnrollment.objects.bulk_create(
+            [SubjectEnrollment(student_id=sid, subject=subject, teacher=teacher) for sid in missing],
+            ignore_conflicts=True
+        )
+    created_count = len(missing)
+
+    reassigned_count = SubjectEnrollment.objects.filter(subject=subject).exclude(
+        teacher=teacher
+    ).update(teacher=teacher)
+
+    return (created_count, reassigned_count)
+
+
+def mark_attendance_roster(subject, date, present_ids, teacher):
+    """
+    Persists one attendance roster (subject, date, set of present students) for
+    every student enrolled in the subject.
+
+    All rows are written with a single ``bulk_create`` that upserts on the
+    (student, subject, date) unique key, so re-submitting the same day simply
+    overwrites the earlier marks. The subject row and the earlier marks are
+    locked first, so overlapping submissions of a roster are applied one after
+    the other and the summary deltas are never counted twice.
+
+    Args:
+        subject: Subject the attendance is taken for
+        date: date (or ISO date string) of the lecture
+        present_ids: iterable of student ids marked present
+        teacher: Teacher marking the attendance
+
+    Returns:
+        dict: counters for the roster (students, present, absent, enrollments
+        created/reassigned, SQL statements executed and elapsed milliseconds)
+    """
+    from .models import Subject, SubjectEnrollment
+
+    present = {int(pk) for pk in present_ids if str(pk).isdigit()}
+    statements = []
+
+    def count_statements(execute, sql, params, many, context):
+        statements.append(sql)
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(count_statements), transaction.atomic():
+        # Serializes submissions for the subject, including the first one of a day when no marks exist to lock yet
+        Subject.objects.select_for_update().only('pk').get(pk=subject.pk)
+        created, reassigned = sync_subject_enrollments(subject, teacher)
+        student_ids = list(
+            SubjectEnrollment.objects.filter(subject=subject).values_list('student_id', flat=True)
+        )
+        previous = dict(
+            Attendance.objects.select_for_update().filter(subject=subject, date=date).values_list(
+                'student_id', 'is_present'
+            )
+        )
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    student_id=sid,
+                    subject=subject,
+                    date=date,
+                    is_present=sid in present,
+                    marked_by=teacher
+                )
+                for sid in student_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'subject', 'date'],
+            update_fields=['is_present', 'marked_by']
+        )
+        # New marks add to the total, re-submitted ones only move between present and absent
+        adjust_attendance_summary({
+            (sid, subject.pk): (
+                0 if sid in previous else 1,
+                (sid in present) - bool(previous.get(sid, False))
+            )
+            for sid in student_ids
+        })
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    present_count = sum(1 for sid in student_ids if sid in present)
+    return {
+        'students': len(student_ids),
+        'present': present_count,
+        'absent': len(student_ids) - present_count,
+        'enrollments_created': created,
+        'enrollments_reassigned': reassigned,
+        'statements': len(statements),
+        'elapsed_ms': round(elapsed_ms, 2),
+    }
+
+
+def import_fees_csv(csv_file, user, filename='', chunk_size=1000, on_chunk=None):
+    """
+    Streams a fees CSV (roll_number,title,amount,fine,rewards) into Fees.
+    
+    The upload is decoded line by line, so only one chunk of rows is held in
+    memory. Per chunk, all roll numbers are resolved with one ``IN`` query and
+    the fees are upserted on (student, title) with a single
+    ``bulk_create(update_conflicts=True)``. Progress is written to the returned
+    ImportLog after every chunk.
+    
+    The file is read through once before anything is written, so a file that
+    is not UTF-8 CSV imports nothing. A database error stops the import; it is
+    recorded on the ImportLog, and the chunks before it stay imported.
+    
+    Args:
+        csv_file: seekable binary file-like object iterable by lines (e.g. an UploadedFile)
+        user: User recorded as allocated_by / uploaded_by
+        filename: original file name for the ImportLog
+        chunk_size: rows processed per batch
+        on_chunk: optional callable receiving the ImportLog after every chunk
+    
+    Returns:
+        tuple: (ImportLog, list of the first error messages)
+    """
+    import codecs
+    import csv
+    from decimal import Decimal, InvalidOperation
+    from django.utils import timezone
+    from .models import Fees, ImportLog, Student
+    
+    log = ImportLog.objects.create(uploaded_by=user, filename=filename)
+    errors = []
+    error_count = 0
+    
+    def add_error(message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < 100:
+            errors.append(message)
+    
+    def flush(rows):
+        """Upsert one chunk of (line number, row) pairs; returns (created, updated)."""
+        rolls = {(row.get('roll_number') or row.get('roll') or '').strip() for _, row in rows}
+        student_ids = dict(Student.objects.filter(roll_number__in=rolls).values_list('roll_number', 'id'))
+        
+        fees = {}
+        for i, row in rows:
+            roll = (row.get('roll_number') or row.get('roll') or '').strip()
+            title = row.get('title')
+            amount = row.get('amount')
+            
+            if not roll or not title or not amount:
+                add_error(f'Row {i}: missing required fields')
+                continue
+            if roll not in student_ids:
+                add_error(f'Row {i}: student with roll {roll} not found')
+                continue
+            try:
+                amount_val = Decimal(amount)
+                fine_val = Decimal(row.get('fine') or 0)
+                rewards_val = Decimal(row.get('rewards') or 0)
+            except (InvalidOperation, TypeError):
+                add_error(f'Row {i}: invalid numeric values')
+                continue
+            
+            # Later rows for the same (student, title) win, as with sequential updates
+            fees[(student_ids[roll], title)] = Fees(
+                student_id=student_ids[roll],
+                title=title,
+                amount=amount_val,
+                fine=fine_val,
+                rewards=rewards_val,
+                allocated_by=user
+            )
+        
+        if not fees:
+            return (0, 0)
+        
+        with transaction.atomic():
+            existing = set(
+                Fees.objects.filter(
+                    student_id__in={sid for sid, _ in fees},
+                    title__in={title for _, title in fees}
+                ).values_list('student_id', 'title')
+            )
+            Fees.objects.bulk_create(
+                list(fees.values()),
+                update_conflicts=True,
+                unique_fields=['student', 'title'],
+                update_fields=['amount', 'fine', 'rewards', 'allocated_by']
+            )
+        updated = len(existing.intersection(fees))
+        return (len(fees) - updated, updated)
+    
+    created = updated = processed = 0
+    
+    def save_progress(**extra):
+        log.rows_processed = processed
+        log.created_count = created
+        log.updated_count = updated
+        log.error_count = error_count
+        log.errors_preview = '\n'.join(errors[:30])[:1000]
+        for field, value in extra.items():
+            setattr(log, field, value)
+        log.save(update_fields=['rows_processed', 'created_count', 'updated_count', 'error_count', 'errors_preview', *extra])
+        if on_chunk:
+            on_chunk(log)
+    
+    def read_rows():
+        return enumerate(csv.DictReader(codecs.iterdecode(csv_file, 'utf-8-sig')), start=2)
+    
+    try:
+        for _ in read_rows():
+            pass
+    except (UnicodeDecodeError, csv.Error) as e:
+        add_error(f'Unable to read uploaded file (ensure UTF-8 CSV): {e}')
+        save_progress(completed_at=timezone.now())
+        return (log, errors)
+    csv_file.seek(0)
+    
+    chunk = []
+    try:
+        for i, row in read_rows():
+            chunk.append((i, row))
+            if len(chunk) >= chunk_size:
+                c, u = flush(chunk)
+                created, updated, processed = created + c, updated + u, processed + len(chunk)
+                chunk = []
+                save_progress()
+        if chunk:
+            c, u = flush(chunk)
+            created, updated, processed = created + c, updated + u, processed + len(chunk)
+    except DatabaseError as e:
+        add_error(f'Import stopped at row {processed + 2}, earlier rows were saved: {e}')
+    save_progress(completed_at=timezone.now())
+    
+    return (log, errors)
+
+
 print("College ERP Models, Forms, and Utils created successfully!")
 print("\nNext steps:")
 print("1. Install required packages: pip install django psycopg2-binary PyPDF2")
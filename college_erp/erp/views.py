@@ -1,10 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db.models import Avg, Count, Q
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
 from datetime import datetime, timedelta
 from .models import *
 from .forms import *
@@ -16,15 +17,19 @@ from django.http import JsonResponse
 
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import StreamingHttpResponse
-import csv
-import io
-import zipfile
 from django.utils.encoding import smart_str
 from .forms import DegreeForm
 from .models import Degree
 from .models import Timetable
 from .forms import TimetableForm
-from .models import TimetableSlot
+from .jobs import enqueue as enqueue_job
+from .exports import filter_export, stream_csv
+from .reports import filter_resumes, get_no_dues_certificate, iter_resumes_zip
+from . import media_index
+from .timetables import grid_clashes, save_weekly_slots, section_grid_html
+import logging
+
+logger = logging.getLogger(__name__)
 
 # ============ Authentication Views ============
 
@@ -477,6 +482,7 @@ def teacher_dashboard(request):
         'teacher': teacher,
         'subjects': subjects,
         'notices': notices,
+        'departments': Department.objects.all(),
     }
     return render(request, 'teacher/dashboard.html', context)
 
@@ -648,15 +654,15 @@ def teacher_exam_results(request, exam_id):
 
     # Optionally support CSV download
     if request.GET.get('format') == 'csv':
-        import csv
-        from django.http import HttpResponse
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{exam.title}_results.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['Roll Number', 'Student Name', 'Score', 'Submitted At', 'Proctor Log'])
-        for a in attempts:
-            writer.writerow([a.student.roll_number, a.student.user.get_full_name(), a.score or '', a.submitted_at or '', a.proctor_log or ''])
-        return response
+        rows = (
+            [a.student.roll_number, a.student.user.get_full_name(), a.score or '', a.submitted_at or '', a.proctor_log or '']
+            for a in filter_export(attempts, request.GET).order_by('student__roll_number').iterator(chunk_size=500)
+        )
+        return stream_csv(
+            f'{exam.title}_results.csv',
+            ['Roll Number', 'Student Name', 'Score', 'Submitted At', 'Proctor Log'],
+            rows
+        )
 
     return render(request, 'teacher/exam_results.html', {'exam': exam, 'attempts': attempts})
 
@@ -890,71 +896,21 @@ def teacher_mark_attendance(request, subject_id):
         date = request.POST.get('date')
         student_ids = request.POST.getlist('present')
         
-        # Get all students enrolled in this subject (regardless of teacher assignment)
-        enrollments = SubjectEnrollment.objects.filter(subject=subject).select_related('student', 'student__user')
-        
-        # If no enrollments, get students by department and semester and create enrollments
-        if not enrollments.exists():
-            students = Student.objects.filter(
-                department=subject.department,
-                semester=subject.semester
-            )
-            # Create enrollments with current teacher
-            for student in students:
-                SubjectEnrollment.objects.get_or_create(
-                    student=student,
-                    subject=subject,
-                    defaults={'teacher': teacher}
-                )
-            enrollments = SubjectEnrollment.objects.filter(subject=subject).select_related('student', 'student__user')
-        else:
-            # Update teacher assignment for existing enrollments if needed
-            for enrollment in enrollments:
-                if enrollment.teacher != teacher:
-                    enrollment.teacher = teacher
-                    enrollment.save()
-        
-        # Mark attendance for all enrolled students
-        for enrollment in enrollments:
-            Attendance.objects.update_or_create(
-                student=enrollment.student,
-                subject=subject,
-                date=date,
-                defaults={
-                    'is_present': str(enrollment.student.id) in student_ids,
-                    'marked_by': teacher
-                }
-            )
-        messages.success(request, f'Attendance marked successfully for {enrollments.count()} students')
+        # Persist the whole roster in a fixed number of statements
+        stats = mark_attendance_roster(subject, date, student_ids, teacher)
+        logger.info(
+            'Attendance roster %s on %s: %d students, %d statements, %.2f ms',
+            subject.code, date, stats['students'], stats['statements'], stats['elapsed_ms']
+        )
+        messages.success(request, f"Attendance marked successfully for {stats['students']} students")
         return redirect('teacher_view_attendance', subject_id=subject_id)
     
+    # Auto-enroll students of the same department/semester and take over the enrollments
+    sync_subject_enrollments(subject, teacher)
+    
     # Get all enrollments for this subject (not filtered by teacher)
     enrollments = SubjectEnrollment.objects.filter(subject=subject).select_related('student', 'student__user')
     
-    # If no enrollments exist, auto-create them for students in same department and semester
-    if not enrollments.exists():
-        students = Student.objects.filter(
-            department=subject.department,
-            semester=subject.semester
-        )
-        
-        # Create enrollments with current teacher
-        for student in students:
-            SubjectEnrollment.objects.get_or_create(
-                student=student,
-                subject=subject,
-                defaults={'teacher': teacher}
-            )
-        
-        # Re-query to get the newly created enrollments
-        enrollments = SubjectEnrollment.objects.filter(subject=subject).select_related('student', 'student__user')
-    else:
-        # Update teacher assignment for existing enrollments
-        for enrollment in enrollments:
-            if enrollment.teacher != teacher:
-                enrollment.teacher = teacher
-                enrollment.save()
-    
     return render(request, 'teacher/mark_attendance.html', {
         'subject': subject,
         'enrollments': enrollments,
@@ -970,22 +926,22 @@ def teacher_view_attendance(request, subject_id):
     subject = get_object_or_404(Subject, id=subject_id)
     
     # Get all students enrolled in this subject
-    enrollments = SubjectEnrollment.objects.filter(subject=subject, teacher=teacher)
+    enrollments = SubjectEnrollment.objects.filter(subject=subject, teacher=teacher).select_related('student', 'student__user')
+    summaries = get_attendance_summaries(subject_ids=[subject.id])
     
     # Get attendance data for each student
     attendance_data = []
     for enrollment in enrollments:
-        total = Attendance.objects.filter(student=enrollment.student, subject=subject).count()
-        present = Attendance.objects.filter(student=enrollment.student, subject=subject, is_present=True).count()
-        absent = total - present
-        percentage = round((present / total * 100), 2) if total > 0 else 0
+        summary = summaries.get((enrollment.student_id, subject.id))
+        total = summary.total if summary else 0
+        present = summary.present if summary else 0
         
         attendance_data.append({
             'student': enrollment.student,
             'total': total,
             'present': present,
-            'absent': absent,
-            'percentage': percentage
+            'absent': total - present,
+            'percentage': summary.percentage if summary else 0
         })
     
     return render(request, 'teacher/view_attendance.html', {
@@ -1005,7 +961,8 @@ def teacher_student_attendance(request, student_id):
     enrollments = SubjectEnrollment.objects.filter(
         student=student, 
         teacher=teacher
-    )
+    ).select_related('subject')
+    summaries = get_attendance_summaries(student_ids=[student.id])
     
     attendance_records = []
     for enrollment in enrollments:
@@ -1014,16 +971,14 @@ def teacher_student_attendance(request, student_id):
             subject=enrollment.subject
         ).order_by('-date')[:10]  # Last 10 records
         
-        total = Attendance.objects.filter(student=student, subject=enrollment.subject).count()
-        present = Attendance.objects.filter(student=student, subject=enrollment.subject, is_present=True).count()
-        percentage = round((present / total * 100), 2) if total > 0 else 0
+        summary = summaries.get((student.id, enrollment.subject_id))
         
         attendance_records.append({
             'subject': enrollment.subject,
             'records': records,
-            'total': total,
-            'present': present,
-            'percentage': percentage
+            'total': summary.total if summary else 0,
+            'present': summary.present if summary else 0,
+            'percentage': summary.percentage if summary else 0
         })
     
     return render(request, 'teacher/student_attendance.html', {
@@ -1089,17 +1044,12 @@ def teacher_download_scorecard(request, student_id):
         return redirect('dashboard')
     
     student = get_object_or_404(Student, id=student_id)
-    enrollments = SubjectEnrollment.objects.filter(student=student, subject__semester=student.semester)
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="scorecard_{student.roll_number}.csv"'
-    
-    import csv
-    writer = csv.writer(response)
-    writer.writerow(['Subject Code', 'Subject Name', 'Mid1', 'Mid2', 'PUT', 'Practical', 'External', 'Total'])
+    enrollments = SubjectEnrollment.objects.filter(
+        student=student, subject__semester=student.semester
+    ).select_related('subject')
     
-    for enrollment in enrollments:
-        writer.writerow([
+    rows = (
+        [
             enrollment.subject.code,
             enrollment.subject.name,
             enrollment.mid1_marks or '-',
@@ -1108,9 +1058,14 @@ def teacher_download_scorecard(request, student_id):
             enrollment.practical_marks or '-',
             enrollment.external_marks or '-',
             enrollment.total_marks or '-'
-        ])
-    
-    return response
+        ]
+        for enrollment in enrollments.iterator()
+    )
+    return stream_csv(
+        f'scorecard_{student.roll_number}.csv',
+        ['Subject Code', 'Subject Name', 'Mid1', 'Mid2', 'PUT', 'Practical', 'External', 'Total'],
+        rows
+    )
 
 
 @login_required(login_url='login')
@@ -1126,82 +1081,15 @@ def admin_import_fees(request):
             messages.error(request, 'No file uploaded')
             return redirect('admin_fees_list')
 
-        import io, csv
-        try:
-            decoded = csv_file.read().decode('utf-8')
-        except Exception:
-            messages.error(request, 'Unable to read uploaded file (ensure UTF-8)')
-            return redirect('admin_fees_list')
-
-        reader = csv.DictReader(io.StringIO(decoded))
-        created = 0
-        updated = 0
-        errors = []
-        for i, row in enumerate(reader, start=2):
-            roll = row.get('roll_number') or row.get('roll')
-            title = row.get('title')
-            amount = row.get('amount')
-            fine = row.get('fine') or 0
-            rewards = row.get('rewards') or 0
-
-            if not roll or not title or not amount:
-                errors.append(f'Row {i}: missing required fields')
-                continue
-
-            try:
-                student = Student.objects.get(roll_number=roll)
-            except Student.DoesNotExist:
-                errors.append(f'Row {i}: student with roll {roll} not found')
-                continue
-
-            try:
-                amount_val = float(amount)
-                fine_val = float(fine)
-                rewards_val = float(rewards)
-            except Exception:
-                errors.append(f'Row {i}: invalid numeric values')
-                continue
-
-            fee_obj, created_flag = Fees.objects.update_or_create(
-                student=student,
-                title=title,
-                defaults={
-                    'amount': amount_val,
-                    'fine': fine_val,
-                    'rewards': rewards_val,
-                    'allocated_by': request.user,
-                }
-            )
-            if created_flag:
-                created += 1
-            else:
-                updated += 1
-
-        # record import log
-        try:
-            from .models import ImportLog
-            log = ImportLog.objects.create(
-                uploaded_by=request.user,
-                filename=getattr(csv_file, 'name', ''),
-                created_count=created,
-                updated_count=updated,
-                error_count=len(errors),
-                errors_preview='\n'.join(errors[:30])[:1000]
-            )
-        except Exception:
-            log = None
-
-        if created:
-            messages.success(request, f'Created {created} fee records')
-        if updated:
-            messages.success(request, f'Updated {updated} fee records')
-        if errors:
-            for e in errors[:10]:
-                messages.error(request, e)
-            if len(errors) > 10:
-                messages.error(request, f'and {len(errors)-10} more errors...')
-
-        return redirect('admin_fees_list')
+        # Imports run in the background job queue so large sheets don't pin a request worker
+        job = enqueue_job(
+            'fee_import',
+            user=request.user,
+            params={'filename': getattr(csv_file, 'name', '')},
+            input_file=csv_file
+        )
+        messages.success(request, 'Fee import queued. You can follow its progress below.')
+        return redirect('job_status', job_id=job.id)
 
     return render(request, 'admin/import_fees.html')
 
@@ -1227,21 +1115,21 @@ def teacher_download_attendance(request, student_id):
         return redirect('dashboard')
     
     student = get_object_or_404(Student, id=student_id)
-    attendance_records = Attendance.objects.filter(student=student)
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="attendance_{student.roll_number}.csv"'
-    
-    import csv
-    writer = csv.writer(response)
-    writer.writerow(['Date', 'Subject', 'Status', 'Percentage'])
     
     subjects = Subject.objects.filter(semester=student.semester, department=student.department)
-    for subject in subjects:
-        percentage = get_attendance_percentage(student, subject)
-        writer.writerow(['-', subject.name, '-', f'{percentage}%'])
-    
-    return response
+    summaries = get_attendance_summaries(student_ids=[student.id])
+    
+    def rows():
+        for subject in subjects.iterator():
+            summary = summaries.get((student.id, subject.id))
+            percentage = summary.percentage if summary else 0
+            yield ['-', subject.name, '-', f'{percentage}%']
+    
+    return stream_csv(
+        f'attendance_{student.roll_number}.csv',
+        ['Date', 'Subject', 'Status', 'Percentage'],
+        rows()
+    )
 
 @login_required
 def teacher_add_notice(request):
@@ -1271,8 +1159,7 @@ def student_dashboard(request):
     student = request.user.student
     enrollments = SubjectEnrollment.objects.filter(student=student, subject__semester=student.semester)
     attendance_percentage = get_attendance_percentage(student)
-    sgpa = student.calculate_sgpa()
-    cgpa = student.calculate_cgpa()
+    sgpa, cgpa = student.calculate_gpa()
     
     notices = Notice.objects.filter(
         department=student.department,
@@ -1305,50 +1192,14 @@ def student_timetable(request):
         return redirect('dashboard')
 
     student = request.user.student
-    timetable = None
-    if student.degree and student.section and student.semester:
-        # match timetable section case-insensitively and filter by semester
-        qs = Timetable.objects.filter(
-            degree=student.degree,
-            section__iexact=student.section,
-            semester=student.semester
-        ).order_by('-updated_at')
-        timetable = None
-        if qs.exists():
-            # prefer a timetable that has slots saved
-            for t in qs:
-                if t.slots.exists():
-                    timetable = t
-                    break
-            # fallback to most recently updated
-            if timetable is None:
-                timetable = qs.first()
-
-    # Build weekly view data. Use timetable.active_days if set.
-    default_days = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat']
-    if timetable:
-        days = timetable.get_active_days_list() or default_days
-    else:
-        days = default_days
-    lectures = list(range(1, 8))
-    # nested map: day -> lecture_number -> subject
-    slots_map = {d: {l: None for l in lectures} for d in days}
-    if timetable:
-        for s in timetable.slots.all():
-            if s.day in slots_map and s.lecture_number in slots_map[s.day]:
-                slots_map[s.day][s.lecture_number] = s.subject
-    # Build table rows for template: list of {'day': d, 'cells': [subject_or_None,..]}
-    table_rows = []
-    for d in days:
-        cells = [slots_map[d][l] for l in lectures]
-        table_rows.append({'day': d, 'cells': cells})
+    # The rendered grid is cached per degree/section/semester (erp/timetables.py)
+    grid_html = None
+    if student.degree_id and student.section and student.semester:
+        grid_html = section_grid_html(student.degree_id, student.section, student.semester)
+
     return render(request, 'student/timetable.html', {
         'student': student,
-        'timetable': timetable,
-        'days': days,
-        'lectures': lectures,
-        'slots_map': slots_map,
-        'table_rows': table_rows,
+        'grid_html': grid_html,
     })
 
 
@@ -1405,6 +1256,9 @@ def teacher_allocate_weekly_timetable(request):
     else:
         selected_days = all_days
 
+    # Submitted grid, kept when a save is refused so the form shows it again
+    posted_cells = None
+
     if request.method == 'POST' and timetable:
         # Save selected days from checkboxes
         posted_days = request.POST.getlist('days')
@@ -1433,44 +1287,45 @@ def teacher_allocate_weekly_timetable(request):
         else:
             timetable.lunch = None
 
-        # Persist selected days on timetable
+        # Persist selected days on timetable, then all slots of the grid in one batch:
+        # posted days get the submitted subjects, unselected days lose their slots
         timetable.active_days = ','.join(posted_days)
-        timetable.save()
+        cells = {
+            (d, l): request.POST.get(f'slot_{d}_{l}')
+            for d in posted_days
+            for l in lectures
+        }
+        # Refuse grids that double-book a subject or teacher across sections and
+        # show the submitted values again so the teacher can fix them
+        schedule, clashes = grid_clashes(timetable, posted_days, cells)
+        if clashes:
+            for clash in clashes:
+                messages.error(request, schedule.describe(clash))
+            selected_days = posted_days or all_days
+            posted_cells = cells
+        else:
+            with transaction.atomic():
+                timetable.save()
+                save_weekly_slots(timetable, posted_days, cells)
 
-        # Save submitted slots for posted days; remove slots for unselected days
-        for d in all_days:
-            if d not in posted_days:
-                # delete any existing slots for this day
-                TimetableSlot.objects.filter(timetable=timetable, day=d).delete()
-            else:
-                for l in lectures:
-                    key = f'slot_{d}_{l}'
-                    sub_id = request.POST.get(key)
-                    if sub_id:
-                        try:
-                            sub = Subject.objects.get(id=sub_id)
-                        except Subject.DoesNotExist:
-                            sub = None
-                    else:
-                        sub = None
-                    TimetableSlot.objects.update_or_create(
-                        timetable=timetable,
-                        day=d,
-                        lecture_number=l,
-                        defaults={'subject': sub}
-                    )
-
-        messages.success(request, 'Weekly timetable updated')
-        # Redirect back to the same page with degree/section/semester selected so teacher sees saved timetable
-        if selected_degree_id and selected_section and selected_semester:
-            return redirect(f'{request.path}?degree={selected_degree_id}&section={selected_section}&semester={selected_semester}')
-        return redirect('teacher_allocate_weekly_timetable')
+            messages.success(request, 'Weekly timetable updated')
+            # Redirect back to the same page with degree/section/semester selected so teacher sees saved timetable
+            if selected_degree_id and selected_section and selected_semester:
+                return redirect(f'{request.path}?degree={selected_degree_id}&section={selected_section}&semester={selected_semester}')
+            return redirect('teacher_allocate_weekly_timetable')
 
     # Build existing slots map for the selected days
     # nested map for teacher form convenience: day -> lecture_number -> subject
     slots_map = {d: {l: None for l in lectures} for d in selected_days}
-    if timetable:
-        for s in timetable.slots.all():
+    if posted_cells is not None:
+        posted_subjects = Subject.objects.in_bulk(
+            [int(v) for v in posted_cells.values() if v and v.isdigit()]
+        )
+        for (d, l), sub_id in posted_cells.items():
+            if d in slots_map and sub_id and sub_id.isdigit():
+                slots_map[d][l] = posted_subjects.get(int(sub_id))
+    elif timetable:
+        for s in timetable.slots.select_related('subject'):
             if s.day in slots_map and s.lecture_number in slots_map[s.day]:
                 slots_map[s.day][s.lecture_number] = s.subject
     # Build table rows for template: list of {'day': d, 'cells': [subject_or_None,..]}
@@ -1563,18 +1418,20 @@ def student_attendance_details(request):
     student = request.user.student
     subjects = Subject.objects.filter(semester=student.semester, department=student.department)
     
+    summaries = get_attendance_summaries(student_ids=[student.id])
+    
     attendance_data = []
     for subject in subjects:
-        total = Attendance.objects.filter(student=student, subject=subject).count()
-        present = Attendance.objects.filter(student=student, subject=subject, is_present=True).count()
-        percentage = round((present / total * 100), 2) if total > 0 else 0
+        summary = summaries.get((student.id, subject.id))
+        total = summary.total if summary else 0
+        present = summary.present if summary else 0
         
         attendance_data.append({
             'subject': subject,
             'total': total,
             'present': present,
             'absent': total - present,
-            'percentage': percentage
+            'percentage': summary.percentage if summary else 0
         })
     
     return render(request, 'student/attendance_details.html', {'attendance_data': attendance_data})
@@ -1619,26 +1476,23 @@ def student_placement_cell(request):
                 job_description = request.POST.get('job_description') or None
                 resume_obj.job_description = job_description
 
-                # Calculate ATS score using uploaded resume file if provided, otherwise use existing file
+                # Score inline only when the file's text is already cached (no PDF parsing);
+                # new uploads are saved immediately and scored by the background job worker.
                 uploaded_file = request.FILES.get('resume_file')
-                ats_score = None
+                needs_scoring = False
                 if uploaded_file:
-                    try:
-                        ats_score = calculate_ats_score(uploaded_file, job_description=job_description)
-                        resume_obj.ats_score = ats_score
-                    except Exception:
-                        resume_obj.ats_score = None
-                else:
-                    # if no new upload, try to use existing saved file
-                    if resume.resume_file:
-                        try:
-                            # resume.resume_file is a FileField, open it for reading
-                            resume.resume_file.open('rb')
-                            with resume.resume_file as existing_file:
-                                ats_score = calculate_ats_score(existing_file, job_description=job_description)
-                                resume_obj.ats_score = ats_score
-                        except Exception:
-                            resume_obj.ats_score = resume.ats_score
+                    resume_obj.content_hash = ''
+                    resume_obj.ats_score = None
+                    resume_obj.ats_status = 'pending'
+                    needs_scoring = True
+                elif resume.resume_file:
+                    resume_text = ResumeText.objects.filter(content_hash=resume.content_hash).first() if resume.content_hash else None
+                    if resume_text is not None:
+                        resume_obj.ats_score = score_resume_text(resume_text, job_description)
+                        resume_obj.ats_status = 'done'
+                    else:
+                        resume_obj.ats_status = 'pending'
+                        needs_scoring = True
 
                 # Ensure target resume folder exists under MEDIA_ROOT
                 try:
@@ -1659,7 +1513,11 @@ def student_placement_cell(request):
                     messages.error(request, 'Failed to save uploaded resume. Check server logs or file permissions.')
                     return redirect('student_placement_cell')
 
-                messages.success(request, f'Resume(s) uploaded successfully! ATS Score: {resume_obj.ats_score}')
+                if needs_scoring:
+                    enqueue_ats_scoring(resume_obj, user=request.user)
+                    messages.success(request, 'Resume uploaded successfully! Your ATS score is being calculated.')
+                else:
+                    messages.success(request, f'Resume(s) uploaded successfully! ATS Score: {resume_obj.ats_score}')
                 return redirect('student_placement_cell')
 
         # SGPA submission form
@@ -1697,22 +1555,21 @@ def student_placement_cell(request):
         except Exception:
             pass
 
-        # Try locating by basename anywhere under MEDIA_ROOT (fallback)
-        base = os.path.basename(name)
-        media_root = settings.MEDIA_ROOT
-        for root, dirs, files in os.walk(media_root):
-            if base in files:
-                rel_path = os.path.relpath(os.path.join(root, base), media_root)
-                # construct URL using MEDIA_URL
-                return settings.MEDIA_URL.rstrip('/') + '/' + rel_path.replace('\\', '/')
-
-        return None
+        # Fallback: locate the file by basename anywhere under MEDIA_ROOT via the media index
+        rel_path = media_index.locate(os.path.basename(name))
+        return media_index.url_for(rel_path) if rel_path else None
 
     resume_url = resolve_file_url(resume.resume_file) if resume else None
+    ats_job = None
+    if resume and resume.ats_status == 'pending':
+        ats_job = Job.objects.filter(
+            kind='ats_score', params__resume_id=resume.id, status__in=['queued', 'running']
+        ).first()
 
     context = {
         'form': form,
         'resume': resume,
+        'ats_job': ats_job,
         'semester_perfs': semester_perfs,
         'cgpa': cgpa,
         'sgpa_form': sgpa_form,
@@ -1825,8 +1682,7 @@ def teacher_student_marks(request, student_id):
         })
     
     overall_percentage = round((total_obtained / total_maximum * 100), 2) if total_maximum > 0 else 0
-    sgpa = student.calculate_sgpa()
-    cgpa = student.calculate_cgpa()
+    sgpa, cgpa = student.calculate_gpa()
     
     return render(request, 'teacher/student_marks.html', {
         'student': student,
@@ -1849,81 +1705,58 @@ def teacher_download_placement_data(request):
     if not hasattr(request.user, 'teacher'):
         return redirect('dashboard')
 
-    # Query Resume records with related student and user
-    resumes = Resume.objects.select_related('student', 'student__user').all()
-
-    # Prepare CSV in memory
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-
-    # Header
-    writer.writerow([
-        'Roll Number', 'Full Name', 'Email', 'Phone', 'Department', 'Semester',
-        '10th %', '12th %', 'ATS Score', 'Resume Filename', 'Resume Path', 'Job Description'
-    ])
-
-    for r in resumes:
-        student = getattr(r, 'student', None)
-        if not student:
-            continue
-
-        full_name = student.user.get_full_name() if student.user else ''
-        email = student.user.email if student.user else ''
-        phone = getattr(student, 'phone', '')
-        department = student.department.name if getattr(student, 'department', None) else ''
-        semester = getattr(student, 'semester', '')
-        tenth = getattr(r, 'tenth_percentage', '')
-        twelfth = getattr(r, 'twelfth_percentage', '')
-        ats = getattr(r, 'ats_score', '')
-        filename = os.path.basename(r.resume_file.name) if r.resume_file else ''
-        path = r.resume_file.name if r.resume_file else ''
-
-        writer.writerow([
-            smart_str(student.roll_number), smart_str(full_name), smart_str(email), smart_str(phone),
-            smart_str(department), smart_str(semester), smart_str(tenth), smart_str(twelfth),
-            smart_str(ats), smart_str(filename), smart_str(path), smart_str(getattr(r, 'job_description', '') or '')
-        ])
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename=placement_data.csv'
-    return response
+    # Query Resume records with everything each row needs, filtered by
+    # ?department=&semester=&min_ats=&max_ats=&min_tenth=&min_twelfth=
+    resumes = filter_export(
+        Resume.objects.select_related('student__user', 'student__department'),
+        request.GET,
+        resume=''
+    ).order_by('student__roll_number')
+
+    def rows():
+        for r in resumes.iterator(chunk_size=500):
+            student = r.student
+            full_name = student.user.get_full_name() if student.user else ''
+            email = student.user.email if student.user else ''
+            department = student.department.name if student.department else ''
+            filename = os.path.basename(r.resume_file.name) if r.resume_file else ''
+            path = r.resume_file.name if r.resume_file else ''
+
+            yield [
+                smart_str(student.roll_number), smart_str(full_name), smart_str(email), smart_str(student.phone),
+                smart_str(department), smart_str(student.semester), smart_str(r.tenth_percentage),
+                smart_str(r.twelfth_percentage), smart_str(r.ats_score),
+                smart_str(filename), smart_str(path), smart_str(r.job_description or '')
+            ]
+
+    return stream_csv(
+        'placement_data.csv',
+        [
+            'Roll Number', 'Full Name', 'Email', 'Phone', 'Department', 'Semester',
+            '10th %', '12th %', 'ATS Score', 'Resume Filename', 'Resume Path', 'Job Description'
+        ],
+        rows()
+    )
 
 
 @login_required
 def teacher_download_resumes_zip(request):
-    """Create a ZIP of all resumes and stream it back to the teacher.
+    """Stream a ZIP of resumes, optionally filtered by ?department=<code>&semester=&min_ats=.
 
-    Skips entries with missing files. Only accessible to users with a `teacher` profile.
+    The archive is produced while it is sent, so memory use does not grow with
+    the number of resumes. Only accessible to users with a `teacher` profile.
     """
     if not hasattr(request.user, 'teacher'):
         return redirect('dashboard')
 
-    resumes = Resume.objects.exclude(resume_file='').select_related('student', 'student__user')
-
-    # Create in-memory zip
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for r in resumes:
-            if not r.resume_file:
-                continue
-            file_path = os.path.join(settings.MEDIA_ROOT, r.resume_file.name)
-            if not os.path.exists(file_path):
-                # try to skip missing files
-                continue
-
-            # Use a filename inside zip that is informative: rollname_filename
-            student = getattr(r, 'student', None)
-            roll = student.roll_number if student else 'unknown'
-            arcname = f"{roll}_{os.path.basename(r.resume_file.name)}"
-            try:
-                zf.write(file_path, arcname)
-            except Exception:
-                continue
-
-    zip_buffer.seek(0)
-    response = HttpResponse(zip_buffer.read(), content_type='application/zip')
-    response['Content-Disposition'] = 'attachment; filename=all_resumes.zip'
+    resumes = filter_resumes(
+        Resume.objects.all(),
+        department=request.GET.get('department'),
+        semester=request.GET.get('semester'),
+        min_ats=request.GET.get('min_ats'),
+    )
+    response = StreamingHttpResponse(iter_resumes_zip(resumes), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename=resumes.zip'
     return response
 
 
@@ -2048,41 +1881,77 @@ def admin_allocate_fees(request):
 @login_required(login_url='login')
 @staff_member_required
 def admin_fees_list(request):
-    all_fees = Fees.objects.select_related('student__user').all()
+    """Fees grouped by student, keyset-paginated by roll number.
+
+    Each page costs three queries (page of students, their fees with balances and
+    per-student totals) regardless of how many fees the institution has.
+    """
+    page_size = 25
+    fees_qs = Fees.objects.all()
     
     # Filter by student if provided
     student_id = request.GET.get('student_id')
     if student_id:
-        all_fees = all_fees.filter(student_id=student_id)
+        fees_qs = fees_qs.filter(student_id=student_id)
     
     # Filter by title if provided
     title = request.GET.get('title')
     if title:
-        all_fees = all_fees.filter(title=title)
+        fees_qs = fees_qs.filter(title=title)
+    
+    # Keyset pagination on roll number: ?after=<roll> for the next page, ?before=<roll> for the previous one
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    students = Student.objects.filter(id__in=fees_qs.values('student_id')).select_related('user')
+    if before:
+        page = list(students.filter(roll_number__lt=before).order_by('-roll_number')[:page_size + 1])
+        has_previous = len(page) > page_size
+        page = page[:page_size][::-1]
+        has_next = True
+    else:
+        if after:
+            students = students.filter(roll_number__gt=after)
+        page = list(students.order_by('roll_number')[:page_size + 1])
+        has_next = len(page) > page_size
+        page = page[:page_size]
+        has_previous = bool(after)
+    
+    page_ids = [st.id for st in page]
+    page_fees = fees_qs.filter(student_id__in=page_ids).with_balances().order_by('student_id', 'id')
+    totals = {
+        row['student_id']: row
+        for row in page_fees.order_by().values('student_id').annotate(
+            total_amount=Sum('annotated_total'),
+            total_paid=Sum('annotated_paid'),
+            total_remaining=Sum('annotated_remaining'),
+        )
+    }
     
     # Group fees by student
-    grouped = {}
-    for f in all_fees.order_by('student__roll_number'):
-        sid = f.student.id
-        if sid not in grouped:
-            grouped[sid] = {
-                'student': f.student,
-                'fees': [],
-                'total_amount': 0.0,
-                'total_paid': 0.0,
-                'total_remaining': 0.0,
-            }
-        grouped[sid]['fees'].append(f)
-        grouped[sid]['total_amount'] += float(f.total_amount or 0)
-        grouped[sid]['total_paid'] += float(f.amount_paid or 0)
-        grouped[sid]['total_remaining'] += float(f.amount_remaining or 0)
-
-    # Convert to list for template ordering
-    grouped_list = [grouped[k] for k in sorted(grouped.keys(), key=lambda x: grouped[x]['student'].roll_number)]
+    grouped = {
+        st.id: {
+            'student': st,
+            'fees': [],
+            'total_amount': totals.get(st.id, {}).get('total_amount') or 0,
+            'total_paid': totals.get(st.id, {}).get('total_paid') or 0,
+            'total_remaining': totals.get(st.id, {}).get('total_remaining') or 0,
+        }
+        for st in page
+    }
+    for f in page_fees:
+        grouped[f.student_id]['fees'].append(f)
+    
+    # Preserve the active filters in the pagination links
+    filters = request.GET.copy()
+    for key in ('after', 'before'):
+        filters.pop(key, None)
 
     context = {
-        'grouped_fees': grouped_list,
+        'grouped_fees': [grouped[st.id] for st in page],
         'title_choices': Fees.TITLE_CHOICES,
+        'filter_query': filters.urlencode(),
+        'next_after': page[-1].roll_number if page and has_next else None,
+        'previous_before': page[0].roll_number if page and has_previous else None,
     }
     
     return render(request, 'admin/fees_list.html', context)
@@ -2127,71 +1996,9 @@ def admin_verify_fees(request, fees_id):
 @login_required(login_url='login')
 @staff_member_required
 def admin_download_fees_report(request):
-    from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    
-    # Create the PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="fees_report.pdf"'
-    
-    doc = SimpleDocTemplate(response, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=6,
-        alignment=1
-    )
-    elements.append(Paragraph("College Fees Report", title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Get all fees
-    all_fees = Fees.objects.all().select_related('student', 'allocated_by')
-    
-    # Create table data
-    data = [['Roll Number', 'Student Name', 'Fee Title', 'Amount', 'Fine', 'Rewards', 'Total', 'Paid', 'Remaining', 'Verified']]
-    
-    for fee in all_fees:
-        data.append([
-            fee.student.roll_number,
-            fee.student.user.get_full_name(),
-            fee.get_title_display(),
-            f"₹{fee.amount}",
-            f"₹{fee.fine}",
-            f"₹{fee.rewards}",
-            f"₹{fee.total_amount}",
-            f"₹{fee.amount_paid}",
-            f"₹{fee.amount_remaining}",
-            "Yes" if fee.is_verified else "No"
-        ])
-    
-    # Create table
-    table = Table(data, colWidths=[1.2*inch, 1.2*inch, 1*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.6*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    return response
+    """Queue the fees report PDF; the finished file is downloaded from the job page."""
+    job = enqueue_job('fees_report', user=request.user)
+    return redirect('job_status', job_id=job.id)
 
 @login_required(login_url='login')
 @login_required(login_url='login')
@@ -2202,7 +2009,7 @@ def student_fees_dashboard(request):
         messages.error(request, 'Student profile not found')
         return redirect('dashboard')
     
-    student_fees_qs = Fees.objects.filter(student=student).prefetch_related('payments')
+    student_fees_qs = Fees.objects.filter(student=student).with_balances()
 
     fees_list = []
     total_amount_due = 0
@@ -2331,92 +2138,21 @@ def student_confirm_payment(request):
 
 @login_required(login_url='login')
 def student_download_no_dues(request):
-    from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.units import inch
-    from datetime import datetime
+    from django.http import FileResponse
     
     try:
-        student = Student.objects.get(user=request.user)
+        student = Student.objects.select_related('user', 'department').get(user=request.user)
     except Student.DoesNotExist:
         messages.error(request, 'Student profile not found')
         return redirect('student_fees_dashboard')
     
-    # Check if student has any outstanding fees
-    student_fees = Fees.objects.filter(student=student)
-    has_outstanding = any(f.amount_remaining > 0 for f in student_fees)
-    
-    # Create the PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="no_dues_{student.roll_number}.pdf"'
-    
-    doc = SimpleDocTemplate(response, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=14,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=6,
-        alignment=1
+    # Rendered once per (student, fee state, day); later downloads are served from disk
+    return FileResponse(
+        get_no_dues_certificate(student),
+        as_attachment=True,
+        filename=f'no_dues_{student.roll_number}.pdf',
+        content_type='application/pdf'
     )
-    elements.append(Paragraph("No Dues Certificate", title_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Student Details
-    student_details = f"""
-    <b>Roll Number:</b> {student.roll_number}<br/>
-    <b>Name:</b> {student.user.get_full_name()}<br/>
-    <b>Department:</b> {student.department.name}<br/>
-    <b>Semester:</b> {student.semester}<br/>
-    <b>Date:</b> {datetime.now().strftime('%d-%m-%Y')}<br/>
-    """
-    elements.append(Paragraph(student_details, styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Fees Summary
-    if has_outstanding:
-        elements.append(Paragraph("<b style='color:red;'>Status: Has Outstanding Fees</b>", styles['Normal']))
-        elements.append(Spacer(1, 0.1*inch))
-        
-        # Create fees table
-        data = [['Fee Title', 'Total Amount', 'Amount Paid', 'Amount Due']]
-        for fee in student_fees:
-            if fee.amount_remaining > 0:
-                data.append([
-                    fee.get_title_display(),
-                    f"₹{fee.total_amount}",
-                    f"₹{fee.amount_paid}",
-                    f"₹{fee.amount_remaining}"
-                ])
-        
-        table = Table(data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ef4444')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(table)
-    else:
-        elements.append(Paragraph("<b style='color:green;'>Status: No Outstanding Dues</b>", styles['Normal']))
-        elements.append(Spacer(1, 0.2*inch))
-        elements.append(Paragraph("This certificate certifies that the student has paid all outstanding fees.", styles['Normal']))
-    
-    elements.append(Spacer(1, 0.3*inch))
-    elements.append(Paragraph("_" * 50, styles['Normal']))
-    elements.append(Paragraph("Administrator Signature", styles['Normal']))
-    
-    doc.build(elements)
-    
-    return response
 
 @login_required(login_url='login')
 def student_fee_details(request, fees_id):
@@ -2563,3 +2299,51 @@ def student_study_materials(request):
     }
     return render(request, 'student/study_materials.html', context)
 
+
+# ============ Background Jobs ============
+
+def _get_job_for_user(request, job_id):
+    """Jobs are visible to the user who queued them and to superusers."""
+    job = get_object_or_404(Job, id=job_id)
+    if job.created_by_id != request.user.id and not request.user.is_superuser:
+        return None
+    return job
+
+
+@login_required
+def job_status(request, job_id):
+    job = _get_job_for_user(request, job_id)
+    if job is None:
+        return redirect('dashboard')
+    return render(request, 'job_status.html', {'job': job})
+
+
+@login_required
+def job_progress(request, job_id):
+    """JSON progress endpoint polled by the job status page."""
+    job = _get_job_for_user(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'not found'}, status=404)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'download_url': reverse('job_download', args=[job.id]) if job.status == 'done' and job.result_file else None,
+    })
+
+
+@login_required
+def job_download(request, job_id):
+    """Serve a finished job's artifact from MEDIA_ROOT."""
+    from django.http import FileResponse, Http404
+
+    job = _get_job_for_user(request, job_id)
+    if job is None or job.status != 'done' or not job.result_file:
+        raise Http404('Result not available')
+    return FileResponse(
+        job.result_file.open('rb'),
+        as_attachment=True,
+        filename=os.path.basename(job.result_file.name)
+    )
@@ -0,0 +1,167 @@
+"""
+Micro-benchmark for erp/ats.py against the previous calculate_ats_score.
+
+    python scripts/benchmark_ats.py [--resumes 2000]
+
+1. Text scoring: the old per-keyword substring scan (with a regex per skill for
+   the job description) vs ats.score_text with the JD skills computed once.
+2. Rescoring the same texts against another job description: the old scan vs
+   ats.score_text.
+3. Bulk rescoring, what rescore_resumes does for a new placement drive: the
+   old scorer had nothing to reuse and rescanned every resume's text, the new
+   path rescores the analysis stored in ResumeText (JSON form, as loaded from
+   the database) without looking at the text.
+
+The matchers in 1 and 2 get the same already extracted text; PDF parsing is
+left out (the extracted-text cache and its benchmark are separate).
+
+Does not need Django settings or a database.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from erp import ats  # noqa: E402
+
+JOB_DESCRIPTION = (
+    'We are hiring a backend engineer with Python, Django and SQL experience. '
+    'Docker, Kubernetes and AWS are a plus; familiarity with React or TypeScript helps.'
+)
+
+OTHER_JOB_DESCRIPTION = (
+    'Data engineer: SQL, PostgreSQL and MongoDB, pandas and NumPy pipelines, '
+    'machine learning with scikit-learn; Git, Docker and GCP.'
+)
+
+FILLER = (
+    'team system using data application design students management performance '
+    'delivered improved reduced customers reports module feature support analysis '
+    'the and of to in for with on by from at as an be this that'
+).split()
+
+
+def legacy_score(text, job_description=None):
+    """The scoring rules of calculate_ats_score before erp/ats.py, on already extracted text."""
+    text_lower = text.lower()
+    score = 0
+    technical_skills = {
+        'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'typescript'],
+        'web': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring', 'asp.net'],
+        'database': ['sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'redis', 'sqlite', 'dynamodb'],
+        'devops': ['docker', 'kubernetes', 'jenkins', 'git', 'github', 'gitlab', 'ci/cd', 'aws', 'azure', 'gcp'],
+        'data': ['machine learning', 'deep learning', 'data science', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn']
+    }
+    skills_found = set()
+    for category, skills in technical_skills.items():
+        for skill in skills:
+            if skill in text_lower:
+                skills_found.add(skill)
+    score += min(len(skills_found) * 2, 30)
+    if job_description:
+        jd_text = job_description.lower()
+        jd_skills = set()
+        for category, skills in technical_skills.items():
+            for skill in skills:
+                if ' ' in skill:
+                    if skill in jd_text:
+                        jd_skills.add(skill)
+                elif re.search(r"\b" + re.escape(skill) + r"\b", jd_text):
+                    jd_skills.add(skill)
+        if jd_skills:
+            score += min(round(len(skills_found.intersection(jd_skills)) / len(jd_skills) * 20), 20)
+    if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text):
+        score += 5
+    if re.search(r'\b\d{10}\b|\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', text):
+        score += 5
+    education_keywords = ['bachelor', 'master', 'phd', 'b.tech', 'm.tech', 'bca', 'mca', 'b.e', 'm.e',
+                          'degree', 'diploma', 'university', 'college', 'cgpa', 'gpa', 'percentage']
+    score += min(sum(2 for keyword in education_keywords if keyword in text_lower), 15)
+    experience_keywords = ['experience', 'worked', 'developed', 'implemented', 'designed', 'built',
+                           'project', 'internship', 'achievement', 'accomplishment', 'responsible for']
+    score += min(sum(1 for keyword in experience_keywords if keyword in text_lower) * 2, 20)
+    soft_skills = ['leadership', 'communication', 'teamwork', 'problem solving', 'analytical',
+                   'collaboration', 'adaptability', 'time management', 'critical thinking']
+    score += min(sum(1 for skill in soft_skills if skill in text_lower) * 2, 10)
+    certification_keywords = ['certified', 'certification', 'certificate', 'aws certified',
+                              'google cloud', 'microsoft certified', 'coursera', 'udemy']
+    score += min(sum(1 for keyword in certification_keywords if keyword in text_lower) * 3, 10)
+    if len(text) > 200:
+        score += 2
+    if any(section in text_lower for section in ['experience', 'education', 'skills', 'projects']):
+        score += 3
+    return min(round(score), 100)
+
+
+def make_resume(rng):
+    """A synthetic resume of ~4-5 KB with a random mix of keywords."""
+    keywords = [kw for keywords, _, _ in ats.CATEGORIES.values() for kw in keywords]
+    lines = [
+        f'Student {rng.randint(1000, 9999)}',
+        f'student{rng.randint(1, 9999)}@college.edu | +91 98{rng.randint(10000000, 99999999)}',
+        'Education', f'B.Tech Computer Science, CGPA {rng.uniform(6, 10):.2f}, {rng.randint(2018, 2024)}',
+        'Skills', ', '.join(rng.sample(keywords, 18)),
+        'Experience', 'Projects',
+    ]
+    for _ in range(40):
+        words = rng.choices(FILLER, k=14) + rng.sample(keywords, 2)
+        rng.shuffle(words)
+        lines.append(' '.join(words).capitalize() + '.')
+    return '\n'.join(lines)
+
+
+def timed(label, func, items):
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed = time.perf_counter() - started
+    per_item = elapsed / len(items) * 1e6
+    print(f'  {label:<44} {per_item:10.1f} us/resume  {len(items) / elapsed:10.0f} resumes/sec')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=2000, help='Synthetic resume texts to score (default: 2000)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [make_resume(rng) for _ in range(args.resumes)]
+
+    print(f'Text scoring, {len(texts)} resumes (~{sum(map(len, texts)) // len(texts)} chars each)')
+    old = timed('legacy substring scan', lambda text: legacy_score(text, JOB_DESCRIPTION), texts)
+    jd_skills = ats.job_description_skills(JOB_DESCRIPTION)
+    new = timed('ats.score_text (JD compiled once)', lambda text: ats.score_text(text, jd_skills=jd_skills), texts)
+    print(f'  speedup: {old / new:.1f}x')
+
+    print(f'\nRescoring the same {len(texts)} resumes against another job description')
+    old = timed('legacy substring scan', lambda text: legacy_score(text, OTHER_JOB_DESCRIPTION), texts)
+    jd_skills = ats.job_description_skills(OTHER_JOB_DESCRIPTION)
+    new = timed('ats.score_text', lambda text: ats.score_text(text, jd_skills=jd_skills), texts)
+    print(f'  speedup: {old / new:.1f}x')
+
+    print(f'\nBulk rescoring {len(texts)} stored resumes for a new drive')
+    # Stored as by models.analysis_to_json: keyword sets become sorted lists
+    analyses = [
+        {**analysis, 'keywords': sorted(analysis['keywords'])}
+        for analysis in map(ats.analyze_text, texts)
+    ]
+    new = timed(
+        'ats.score_analysis (stored analysis)', lambda analysis: ats.score_analysis(analysis, jd_skills), analyses
+    )
+    print(f'  speedup over the legacy scan: {old / new:.1f}x')
+
+    jd_skills = ats.job_description_skills(JOB_DESCRIPTION)
+    changed = sum(
+        1 for text in texts if legacy_score(text, JOB_DESCRIPTION) != ats.score_text(text, jd_skills=jd_skills)['score']
+    )
+    print(f'\n{changed} of {len(texts)} scores differ (whole-word matching: "go" no longer matches "good")')
+
+
+if __name__ == '__main__':
+    main()
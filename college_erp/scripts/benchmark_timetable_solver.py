@@ -0,0 +1,105 @@
+"""
+Benchmark for erp/timetable_solver.py on synthetic colleges.
+
+    python scripts/benchmark_timetable_solver.py [--sections 50 100 250 500] [--budget 30] [--theory 6]
+
+Every college is split into cohorts of five sections (one department and
+semester) sharing six theory subjects by default (3-4 lectures a week) and two labs (two
+blocks of two lectures), over a six-day week of seven lectures. Each subject
+has two teachers and every teacher also teaches a subject of another cohort,
+so sections are coupled through their teachers. A teacher's weekly load ends
+up around 18 of 42 lectures; each section fills about 60% of its week.
+
+``--theory 9`` is a stress case: sections are 94% full and a restart-based
+search may run out of budget on the largest colleges.
+
+Reports solve time, backtracks and whether the result passes
+timetable_solver.validate(). Does not need Django settings or a database.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from erp import timetable_solver  # noqa: E402
+
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+SECTIONS_PER_COHORT = 5
+THEORY_SUBJECTS = 6
+LAB_SUBJECTS = 2
+LAB_LECTURES = 4
+TEACHERS_PER_SUBJECT = 2
+
+
+def make_college(section_count, rng, theory_subjects=THEORY_SUBJECTS):
+    """Return ``(sections, subject_teachers)`` in the format timetable_solver.solve() takes."""
+    sections = {}
+    cohorts = []
+    for cohort in range(max(1, section_count // SECTIONS_PER_COHORT)):
+        subjects = [(f'C{cohort}-T{i}', rng.choice([3, 4]), False) for i in range(theory_subjects)]
+        subjects += [(f'C{cohort}-L{i}', LAB_LECTURES, True) for i in range(LAB_SUBJECTS)]
+        cohorts.append(subjects)
+        for letter in range(SECTIONS_PER_COHORT):
+            if len(sections) < section_count:
+                sections[f'C{cohort}-{chr(ord("A") + letter)}'] = {'days': DAYS, 'subjects': subjects}
+
+    # Subject teacher positions, shuffled so each teacher gets subjects of two different cohorts
+    positions = [
+        (cohort, subject)
+        for cohort, subjects in enumerate(cohorts)
+        for subject, _, _ in subjects
+        for _ in range(TEACHERS_PER_SUBJECT)
+    ]
+    rng.shuffle(positions)
+    subject_teachers = {}
+    teacher = 0
+    while positions:
+        first = positions.pop()
+        second = next((p for p in positions if p[0] != first[0] and p[1] != first[1]), None)
+        for cohort, subject in filter(None, [first, second]):
+            subject_teachers.setdefault(subject, set()).add(f'T{teacher}')
+        if second is not None:
+            positions.remove(second)
+        teacher += 1
+    return sections, subject_teachers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sections', type=int, nargs='+', default=[50, 100, 250, 500])
+    parser.add_argument('--budget', type=float, default=30.0, help='Solver time budget in seconds (default: 30)')
+    parser.add_argument(
+        '--theory', type=int, default=THEORY_SUBJECTS,
+        help=f'Theory subjects per cohort (default: {THEORY_SUBJECTS})'
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f'{"sections":>8} {"teachers":>8} {"lectures":>9} {"seconds":>8} {"backtracks":>10} {"restarts":>8} {"unplaced":>8}  result')
+    for count in args.sections:
+        rng = random.Random(args.seed)
+        sections, subject_teachers = make_college(count, rng, args.theory)
+        teachers = {t for ts in subject_teachers.values() for t in ts}
+        lectures = sum(
+            -(-lectures // timetable_solver.LAB_BLOCK) * timetable_solver.LAB_BLOCK if is_lab else lectures
+            for spec in sections.values() for _, lectures, is_lab in spec['subjects']
+        )
+        solution = timetable_solver.solve(sections, subject_teachers, time_budget=args.budget)
+        problems = timetable_solver.validate(solution, sections)
+        unplaced = sum(lectures for _, _, lectures in solution['unplaced'])
+        if problems:
+            result = f'INVALID ({len(problems)} problems, e.g. {problems[0]})'
+        elif solution['complete']:
+            result = 'complete, clash-free'
+        else:
+            result = 'clash-free, incomplete' + (' (budget exhausted)' if solution['timed_out'] else '')
+        print(
+            f'{len(sections):>8} {len(teachers):>8} {lectures:>9} {solution["elapsed"]:>8.2f} '
+            f'{solution["backtracks"]:>10} {solution["restarts"]:>8} {unplaced:>8}  {result}'
+        )
+
+
+if __name__ == '__main__':
+    main()